@@ -1,27 +1,55 @@
 import os
-import json
+import sys
+import shutil
 import subprocess
 import time
+import threading
 from flask import Flask, request, jsonify, render_template, send_file
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
+from flask_compress import Compress
 from dotenv import load_dotenv
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 from datetime import datetime
 import io
+import tempfile
+import orjson
 import requests
 import psutil
 import concurrent.futures
+import functools
+import logging
+from collections import defaultdict, deque
 
 # Load environment variables
 load_dotenv()
 
+# processor logs through the logging module; per-page details are DEBUG (LOG_LEVEL=DEBUG to see them)
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO),
+    format='%(message)s'
+)
+
 from processor import (
     process_document,
+    supports_in_memory,
     extract_structured_data_with_ollama,
     get_batch_delay,
+    get_extract_workers,
     unload_ollama_model,
+    reset_vision_cache,
+    reset_page_cache,
+    track_extraction,
+    get_ollama_base_url,
+    get_ollama_model,
+    document_digest,
+    DOCUMENT_RESULT_CACHE,
+    OLLAMA_SESSION,
+    VISION_NAME_RE,
 )
 from models_config import (
     VISION_MODELS,
@@ -29,23 +57,127 @@ from models_config import (
     get_models_by_category,
     get_recommended_models_by_vram,
     get_all_model_names,
-    get_family_tiers
+    get_family_tiers,
+    FAMILY_TIER_META,
 )
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson; falls back to Flask's encoder for types orjson rejects"""
+    def dumps(self, obj, **kwargs):
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+app.json.sort_keys = False  # skip per-response key sorting
+# Compress JSON/HTML responses (catalog, families, /extract previews) for remote clients
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
 CORS(app)
+Compress(app)
 
 # Configuration
 VERSION = "1.0.0"
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
-UPLOAD_FOLDER = 'temp_uploads'
+# PDFs are spooled here for pdftoppm; RAM-backed /dev/shm avoids a disk write+read when available
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or (
+    '/dev/shm/ldx_uploads' if os.path.isdir('/dev/shm') else 'temp_uploads'
+)
+UPLOAD_COPY_BUFFER = 1 << 20  # 1 MiB chunks when spooling uploads to disk
+PULL_BAR_INTERVAL = 0.1  # min seconds between terminal progress bar redraws during a pull
+OLLAMA_MAX_INFLIGHT = int(os.environ.get('OLLAMA_MAX_INFLIGHT', '4'))
+TAGS_CACHE_TTL = 3.0  # seconds an /api/tags response is reused across endpoints
+
+# Size tag -> approximate parameter size (B), used to match e.g. ':11b' to a ':latest' install
+SIZE_HINTS = {
+    '270m': 0.3, '3.8b': 3.8, '4b': 4.0, '7b': 7.0,
+    '11b': 11.0, '12b': 12.0, '13b': 13.0, '27b': 27.0, '90b': 90.0
+}
 
 # Ensure folders exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Caps concurrent extractions/pulls so excess requests queue here instead of on the GPU
+OLLAMA_SEMAPHORE = threading.BoundedSemaphore(OLLAMA_MAX_INFLIGHT)
+
+# Shared worker pool for fanning out per-model /api/show probes
+SHOW_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='ollama-show')
+
+_tags_cache = {'t': 0.0, 'url': None, 'data': None}
+_tags_lock = threading.Lock()
+
+def _get_tags(ollama_url, ttl=TAGS_CACHE_TTL):
+    """Return the /api/tags payload, reusing a recent response for the same URL.
+    The lock is held across the fetch so concurrent callers share one round trip.
+    Raises requests exceptions (including HTTPError on non-200) to the caller."""
+    with _tags_lock:
+        now = time.monotonic()
+        if _tags_cache['url'] == ollama_url and now - _tags_cache['t'] < ttl:
+            return _tags_cache['data']
+        resp = OLLAMA_SESSION.get(f"{ollama_url}/api/tags", timeout=5)
+        resp.raise_for_status()
+        _tags_cache.update(t=now, url=ollama_url, data=orjson.loads(resp.content))
+        return _tags_cache['data']
+
+def _invalidate_tags_cache():
+    """Drop the cached /api/tags payload (e.g. after a model was pulled)"""
+    with _tags_lock:
+        _tags_cache.update(t=0.0, url=None, data=None)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# (model name, modified_at) -> is_vision, filled by get_available_models
+_vision_cache = {}
+
+def _classify_vision(ollama_url, model_name, details):
+    """Decide whether an installed model accepts images.
+    Returns (is_vision, confirmed); confirmed is False when /api/show could not be
+    reached and the answer only comes from the name heuristic, so it is not cached."""
+    # CLIP projector listed in /api/tags: vision for sure, no /api/show needed
+    if 'clip' in (details.get('families') or []):
+        return True, True
+    
+    is_vision = False
+    capabilities = []
+    confirmed = False
+    try:
+        show_response = OLLAMA_SESSION.post(
+            f"{ollama_url}/api/show",
+            json={"name": model_name},
+            timeout=5
+        )
+        if show_response.status_code == 200:
+            confirmed = True
+            show_data = orjson.loads(show_response.content)
+            capabilities = show_data.get('capabilities', [])
+            
+            if 'vision' in capabilities:
+                is_vision = True
+            elif 'projector_info' in show_data:
+                is_vision = True
+            else:
+                families = show_data.get('details', {}).get('families', [])
+                if 'clip' in families:
+                    is_vision = True
+                else:
+                    model_info = show_data.get('model_info', {})
+                    if any('.vision.' in k for k in model_info.keys()):
+                        is_vision = True
+    except Exception as e:
+        pass
+    
+    # Name heuristic when /api/show gave no capabilities
+    if not is_vision and not capabilities and VISION_NAME_RE.search(model_name):
+        is_vision = True
+    
+    return is_vision, confirmed
+
 @app.route('/')
 def index():
     """Serve the web interface"""
@@ -79,20 +211,19 @@ def ollama_status():
     """Return Ollama server status and installed models count"""
     ollama_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
     try:
-        resp = requests.get(f"{ollama_url}/api/tags", timeout=5)
-        if resp.status_code != 200:
-            return jsonify({
-                "running": False,
-                "error": f"HTTP {resp.status_code} from Ollama",
-                "ollama_url": ollama_url
-            }), 200
-        data = resp.json()
+        data = _get_tags(ollama_url)
         models = data.get('models', [])
         return jsonify({
             "running": True,
             "installed_models": len(models),
             "ollama_url": ollama_url
         }), 200
+    except requests.exceptions.HTTPError as e:
+        return jsonify({
+            "running": False,
+            "error": f"HTTP {e.response.status_code} from Ollama",
+            "ollama_url": ollama_url
+        }), 200
     except Exception as e:
         return jsonify({
             "running": False,
@@ -105,50 +236,24 @@ def get_available_models():
     """Get ALL models installed in Ollama, marking which are truly vision-capable"""
     ollama_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
     try:
-        response = requests.get(f"{ollama_url}/api/tags", timeout=5)
-        if response.status_code != 200:
+        try:
+            data = _get_tags(ollama_url)
+        except requests.exceptions.HTTPError:
             return jsonify({"error": "Failed to fetch models from Ollama"}), 500
         
-        data = response.json()
         installed_models = data.get('models', [])
         
-        all_models = []
-        
         def process_model(model):
             model_name = model.get('name', '')
             details = model.get('details', {})
-            is_vision = False
-            capabilities = []
             
-            try:
-                show_response = requests.post(
-                    f"{ollama_url}/api/show",
-                    json={"name": model_name},
-                    timeout=5
-                )
-                if show_response.status_code == 200:
-                    show_data = show_response.json()
-                    capabilities = show_data.get('capabilities', [])
-                    
-                    if 'vision' in capabilities:
-                        is_vision = True
-                    elif 'projector_info' in show_data:
-                        is_vision = True
-                    else:
-                        families = show_data.get('details', {}).get('families', [])
-                        if 'clip' in families:
-                            is_vision = True
-                        else:
-                            model_info = show_data.get('model_info', {})
-                            if any('.vision.' in k for k in model_info.keys()):
-                                is_vision = True
-            except Exception as e:
-                pass
-            
-            if not is_vision and not capabilities:
-                model_lower = model_name.lower()
-                if any(kw in model_lower for kw in ['llava', 'vision', '-vl', 'bakllava', 'deepseek-ocr', 'deepseek-vl', 'glm-ocr']):
-                    is_vision = True
+            # Classification only changes when the model is re-pulled (new modified_at)
+            cache_key = (model_name, model.get('modified_at', ''))
+            is_vision = _vision_cache.get(cache_key)
+            if is_vision is None:
+                is_vision, confirmed = _classify_vision(ollama_url, model_name, details)
+                if confirmed:
+                    _vision_cache[cache_key] = is_vision
             
             return {
                 'name': model_name,
@@ -160,12 +265,8 @@ def get_available_models():
                 'is_vision': is_vision
             }
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_model = [executor.submit(process_model, m) for m in installed_models]
-            for future in concurrent.futures.as_completed(future_to_model):
-                all_models.append(future.result())
-                
-        # Sort back to roughly preserve order (optional but nice)
+        # Probes overlap on the shared session pool; map() keeps input order
+        all_models = list(SHOW_EXECUTOR.map(process_model, installed_models))
         all_models.sort(key=lambda x: x['name'])
 
         return jsonify({'models': all_models}), 200
@@ -242,119 +343,72 @@ def get_models_families():
         ollama_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
         installed_models = []
         try:
-            resp = requests.get(f"{ollama_url}/api/tags", timeout=5)
-            if resp.status_code == 200:
-                installed_models = resp.json().get('models', [])
+            installed_models = _get_tags(ollama_url).get('models', [])
         except Exception:
             pass
 
         families = get_family_tiers()
 
-        # Build response merging VISION_MODELS metadata where possible
-        # Create a quick lookup for metadata by name
-        meta_by_name = {}
-        for cat in VISION_MODELS.values():
-            for m in cat.get('models', []):
-                meta_by_name[m['name']] = m
+        installed_index = _index_installed(_tags_snapshot(installed_models))
 
         def is_model_installed(target_model):
             """Check if a specific model variant is installed, using size hints when available"""
             # Extract base name and size tag from target
-            target_parts = target_model.split(':')
-            target_base = target_parts[0]
-            target_tag = target_parts[1] if len(target_parts) > 1 else None
+            target_base, _, target_tag = target_model.partition(':')
             
-            # Size mapping: tag -> approximate parameter size (B)
-            size_hints = {
-                '270m': 0.3,
-                '3.8b': 3.8,
-                '4b': 4.0,
-                '7b': 7.0,
-                '11b': 11.0,
-                '12b': 12.0,
-                '13b': 13.0,
-                '27b': 27.0,
-                '90b': 90.0
-            }
+            entries = installed_index.get(target_base)
+            if not entries:
+                return False
+            # If target has no tag and we found matching base, consider it installed
+            if not target_tag:
+                return True
             
-            for installed in installed_models:
-                installed_name = installed.get('name', '')
-                installed_parts = installed_name.split(':')
-                installed_base = installed_parts[0]
-                installed_tag = installed_parts[1] if len(installed_parts) > 1 else 'latest'
-                
-                # Must match base name
-                if installed_base != target_base:
-                    continue
-                
-                # If exact match (including tag), it's definitely installed
-                if installed_name == target_model:
+            for installed_tag, param_size, _ in entries:
+                # Exact tag match (covers the exact name match)
+                if installed_tag == target_tag:
                     return True
-                
-                # If installed tag matches target tag (ignoring "latest")
-                if target_tag and installed_tag == target_tag:
-                    return True
-                
-                # IMPORTANT: Check parameter size from details for "latest" tags
+                # IMPORTANT: Check parameter size for "latest" tags
                 # This handles cases like llama3.2-vision:latest vs llama3.2-vision:11b
-                details = installed.get('details', {})
-                param_size_str = details.get('parameter_size', '')
-                
-                if param_size_str and target_tag:
-                    # Parse parameter size like "10.7B" or "27.4B"
-                    try:
-                        param_size = float(param_size_str.replace('B', '').strip())
-                        target_size = size_hints.get(target_tag.lower())
-                        
-                        if target_size:
-                            # Allow ±25% tolerance for size matching (more lenient)
-                            if abs(param_size - target_size) / target_size < 0.25:
-                                return True
-                    except (ValueError, ZeroDivisionError):
-                        pass
-                
-                # If target has no tag and we found matching base, consider it installed
-                if not target_tag and installed_base == target_base:
+                if _size_matches(param_size, target_tag):
                     return True
             
             return False
 
         result = {}
-        for key, fam in families.items():
-            tiers = {}
-            for tier, model_name in fam.get('tiers', {}).items():
-                if model_name is None:
-                    # Tier not available for this family
-                    tiers[tier] = {
-                        'model': None,
-                        'installed': False,
-                        'display_name': 'N/A',
-                        'size': None,
-                        'vram': None,
-                        'speed': None,
-                        'accuracy': None,
-                        'description': None,
-                        'use_case': None
-                    }
-                else:
-                    meta = meta_by_name.get(model_name, {})
-                    installed_flag = is_model_installed(model_name)
-                    tiers[tier] = {
-                        'model': model_name,
-                        'installed': installed_flag,
-                        'display_name': meta.get('display_name', model_name),
-                        'size': meta.get('size'),
-                        'vram': meta.get('vram'),
-                        'speed': meta.get('speed'),
-                        'accuracy': meta.get('accuracy'),
-                        'description': meta.get('description'),
-                        'use_case': meta.get('use_case')
-                    }
-            result[key] = {
-                'label': fam.get('label', key),
-                'requires_hf': fam.get('requires_hf', False),
-                'tiers': tiers
-            }
+        for (key, tier), (model_name, meta) in FAMILY_TIER_META.items():
+            family = result.get(key)
+            if family is None:
+                fam = families[key]
+                family = result[key] = {
+                    'label': fam.get('label', key),
+                    'requires_hf': fam.get('requires_hf', False),
+                    'tiers': {}
+                }
+            if model_name is None:
+                # Tier not available for this family
+                family['tiers'][tier] = {
+                    'model': None,
+                    'installed': False,
+                    'display_name': 'N/A',
+                    'size': None,
+                    'vram': None,
+                    'speed': None,
+                    'accuracy': None,
+                    'description': None,
+                    'use_case': None
+                }
+            else:
+                family['tiers'][tier] = {
+                    'model': model_name,
+                    'installed': is_model_installed(model_name),
+                    'display_name': meta.display_name,
+                    'size': meta.size,
+                    'vram': meta.vram,
+                    'speed': meta.speed,
+                    'accuracy': meta.accuracy,
+                    'description': meta.description,
+                    'use_case': meta.use_case
+                }
 
         return jsonify({'families': result}), 200
     except Exception as e:
@@ -377,17 +431,21 @@ def pull_model():
         ollama_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
         pull_url = f"{ollama_url}/api/pull"
 
-        # Stream pull progress from Ollama
-        progress = []
+        # Stream pull progress from Ollama; only the tail is returned to the client
+        progress = deque(maxlen=10)
         last_status = None
-        with requests.post(pull_url, json={"name": model}, stream=True, timeout=600) as r:
+        show_bar = sys.stdout.isatty()
+        last_bar = 0.0
+        # Pulls are bandwidth-hungry and contend with inference, so they share the inflight cap
+        with OLLAMA_SEMAPHORE, OLLAMA_SESSION.post(pull_url, json={"name": model}, stream=True, timeout=600) as r:
             r.raise_for_status()
-            for line in r.iter_lines(decode_unicode=True):
+            # Raw bytes lines: orjson parses them without a per-line str decode
+            for line in r.iter_lines():
                 if not line:
                     continue
                 # Each line is JSON like {"status":"pulling ...","completed":123,"total":456}
                 try:
-                    entry = json.loads(line)
+                    entry = orjson.loads(line)
                     progress.append(entry)
                     
                     # Log progress to terminal
@@ -396,20 +454,27 @@ def pull_model():
                         print(f"📦 {status}")
                         last_status = status
                     
-                    # Show progress bar for downloads
-                    if 'completed' in entry and 'total' in entry:
+                    # Show progress bar for downloads (skipped when stdout is piped/logged)
+                    if show_bar and 'completed' in entry and 'total' in entry:
                         completed = entry['completed']
                         total = entry['total']
-                        if total > 0:
+                        # Throttle redraws; always draw the final 100% state
+                        now = time.monotonic()
+                        if total > 0 and (now - last_bar >= PULL_BAR_INTERVAL or completed == total):
+                            last_bar = now
                             percent = (completed / total) * 100
                             bar_length = 40
                             filled = int(bar_length * completed / total)
                             bar = '█' * filled + '░' * (bar_length - filled)
                             print(f"\r   [{bar}] {percent:.1f}% ({completed/1024/1024:.1f}/{total/1024/1024:.1f} MB)", end='', flush=True)
                 except Exception:
-                    progress.append({"raw": line})
+                    progress.append({"raw": line.decode('utf-8', 'replace')})
 
         print(f"\n\n✅ Download completed: {model}\n")
+        _invalidate_tags_cache()
+        reset_vision_cache()
+        reset_page_cache()
+        DOCUMENT_RESULT_CACHE.clear()
 
         # Optionally set current model in env for this process
         if set_current:
@@ -420,7 +485,7 @@ def pull_model():
             "success": True,
             "model": model,
             "set_current": set_current,
-            "progress": progress[-10:] if len(progress) > 10 else progress  # return tail
+            "progress": list(progress)
         }), 200
     except requests.exceptions.RequestException as re:
         error_msg = f"Ollama pull failed: {str(re)}"
@@ -493,7 +558,8 @@ def set_model():
 
     # Normalize model name to match installed version
     # e.g., llama3.2-vision:11b -> llama3.2-vision:latest if that's what's installed
-    normalized_model = normalize_model_name(model_name)
+    # Names without a ':tag' have nothing to normalize, so skip the /api/tags lookup
+    normalized_model = normalize_model_name(model_name) if ':' in model_name else model_name
     
     # Update environment variable for current session
     os.environ['OLLAMA_MODEL'] = normalized_model
@@ -506,6 +572,31 @@ def set_model():
         "requested": model_name
     }), 200
 
+def _tags_snapshot(installed_models):
+    """Hashable (name, parameter_size) view of an /api/tags model list"""
+    return tuple(
+        (m.get('name', ''), m.get('details', {}).get('parameter_size', ''))
+        for m in installed_models
+    )
+
+def _index_installed(tags_snapshot):
+    """Group installed models by base name: base -> [(tag, parameter size in B or None, full name)].
+    Names and "10.7B"-style sizes are parsed once instead of once per lookup."""
+    index = defaultdict(list)
+    for name, param_size_str in tags_snapshot:
+        base, _, tag = name.partition(':')
+        try:
+            param_size = float(param_size_str.replace('B', '').strip())
+        except ValueError:
+            param_size = None
+        index[base].append((tag or 'latest', param_size, name))
+    return index
+
+def _size_matches(param_size, target_tag):
+    """True if an installed parameter size is within ±25% of the size implied by target_tag"""
+    target_size = SIZE_HINTS.get(target_tag.lower())
+    return bool(param_size is not None and target_size and abs(param_size - target_size) / target_size < 0.25)
+
 def normalize_model_name(target_model):
     """
     Normalize a model name to match what's actually installed in Ollama.
@@ -514,67 +605,40 @@ def normalize_model_name(target_model):
     ollama_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
     
     try:
-        response = requests.get(f"{ollama_url}/api/tags", timeout=5)
-        if response.status_code != 200:
+        try:
+            data = _get_tags(ollama_url)
+        except requests.exceptions.HTTPError:
             print(f"Warning: Could not fetch Ollama models for normalization")
             return target_model
         
-        data = response.json()
-        installed_models = data.get('models', [])
-        
-        # Parse target
-        target_parts = target_model.split(':')
-        target_base = target_parts[0]
-        target_tag = target_parts[1] if len(target_parts) > 1 else None
-        
-        # Size hints for matching
-        size_hints = {
-            '270m': 0.3, '3.8b': 3.8, '4b': 4.0, '7b': 7.0,
-            '11b': 11.0, '12b': 12.0, '13b': 13.0, '27b': 27.0, '90b': 90.0
-        }
-        
-        # First pass: exact match
-        for installed in installed_models:
-            if installed.get('name') == target_model:
-                return target_model
-        
-        # Second pass: base name match + size matching for :latest tags
-        for installed in installed_models:
-            installed_name = installed.get('name', '')
-            installed_parts = installed_name.split(':')
-            installed_base = installed_parts[0]
-            
-            if installed_base != target_base:
-                continue
-            
-            # Check parameter size if target has a size tag
-            if target_tag:
-                details = installed.get('details', {})
-                param_size_str = details.get('parameter_size', '')
-                
-                if param_size_str:
-                    try:
-                        param_size = float(param_size_str.replace('B', '').strip())
-                        target_size = size_hints.get(target_tag.lower())
-                        
-                        if target_size and abs(param_size - target_size) / target_size < 0.25:
-                            print(f"Normalized {target_model} -> {installed_name} (size match: {param_size}B ≈ {target_size}B)")
-                            return installed_name
-                    except (ValueError, ZeroDivisionError):
-                        pass
-        
-        # No match found, return original
-        print(f"Warning: Could not normalize {target_model}, using as-is")
-        return target_model
+        # Memoized until the installed set (or a model's size) changes
+        return _normalize_impl(target_model, _tags_snapshot(data.get('models', [])))
         
     except Exception as e:
         print(f"Error normalizing model name: {e}")
         return target_model
-    return jsonify({
-        "success": True,
-        "model": model_name,
-        "message": "Model updated for current session"
-    }), 200
+
+@functools.lru_cache(maxsize=256)
+def _normalize_impl(target_model, tags_tuple):
+    """Match target_model against a (name, parameter_size) snapshot of installed models"""
+    target_base, _, target_tag = target_model.partition(':')
+    entries = _index_installed(tags_tuple).get(target_base, [])
+    
+    # First pass: exact match
+    for _, _, installed_name in entries:
+        if installed_name == target_model:
+            return target_model
+    
+    # Second pass: base name match + size matching for :latest tags
+    if target_tag:
+        for _, param_size, installed_name in entries:
+            if _size_matches(param_size, target_tag):
+                print(f"Normalized {target_model} -> {installed_name} (size match: {param_size}B ≈ {SIZE_HINTS[target_tag.lower()]}B)")
+                return installed_name
+    
+    # No match found, return original
+    print(f"Warning: Could not normalize {target_model}, using as-is")
+    return target_model
 
 @app.route('/extract', methods=['POST'])
 def extract_data_route():
@@ -593,7 +657,7 @@ def extract_data_route():
         return jsonify({"error": "Field 'fields_to_extract' is required"}), 400
     
     try:
-        fields_to_extract = json.loads(fields_to_extract)
+        fields_to_extract = orjson.loads(fields_to_extract)
         if not isinstance(fields_to_extract, dict):
             raise ValueError
     except Exception:
@@ -605,6 +669,8 @@ def extract_data_route():
     extraction_strategy = request.form.get('extraction_strategy', 'auto')  # auto | single_pass
     page_range = request.form.get('page_range', 'all')  # all | first | N (int)
     model_override = request.form.get('model', None)  # per-request model override
+    # Re-run the extraction even if this file was already extracted with the same options
+    no_cache = request.form.get('no_cache', 'false').lower() in ('true', '1', 'yes')
 
     # Apply per-request model override if provided
     original_model = None
@@ -613,68 +679,112 @@ def extract_data_route():
         os.environ['OLLAMA_MODEL'] = model_override
         print(f"Per-request model override: {model_override}")
 
+    # Everything besides the file and model that changes the result (see DOCUMENT_RESULT_CACHE)
+    request_signature = (
+        orjson.dumps(fields_to_extract), additional_request, document_type,
+        system_prompt, extraction_strategy, page_range,
+    )
+
+    def process_one(filename, source, mime_type):
+        """Process + extract a single upload, always removing its temp file.
+        source is a spooled file path, or the raw upload bytes for types the
+        processor reads from memory (see supports_in_memory).
+        Returns (result, used_model); used_model is False when served from DOCUMENT_RESULT_CACHE."""
+        file_start = time.time()
+        print(f"Processing file: {filename}")
+        filepath = source if isinstance(source, str) else None
+        try:
+            cache_key = (document_digest(source), get_ollama_base_url(), get_ollama_model(), request_signature)
+            cached = None if no_cache else DOCUMENT_RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                print(f"File {filename} already extracted with the same model and options, reusing the result")
+                return {"filename": filename, **cached, "duration_seconds": round(time.time() - file_start, 1)}, False
+
+            # Process document (extract text/image)
+            document_content = process_document(source, mime_type, page_range)
+
+            # Capture preview images (first 3 pages max) for the validation UI
+            preview_images = []
+            if document_content.get("type") == "pdf":
+                pages = document_content.get("pages", [])
+                preview_images = pages[:min(3, len(pages))]
+            elif document_content.get("type") == "image":
+                img_data = document_content.get("data")
+                if img_data:
+                    preview_images = [img_data]
+
+            # Extract structured data with Ollama
+            with OLLAMA_SEMAPHORE, track_extraction():
+                extraction_result = extract_structured_data_with_ollama(
+                    document_content=document_content,
+                    fields_to_extract=fields_to_extract,
+                    additional_request=additional_request,
+                    document_type=document_type,
+                    system_prompt=system_prompt,
+                    filepath=filepath,
+                    mime_type=mime_type,
+                    extraction_strategy=extraction_strategy,
+                )
+
+            # Partial or degraded results (failed/retried pages) are not cached, so resubmitting can recover
+            if "error" not in extraction_result and "page_errors" not in extraction_result:
+                DOCUMENT_RESULT_CACHE.put(cache_key, {
+                    "extraction": extraction_result,
+                    "preview_images": preview_images,
+                })
+
+            duration_s = round(time.time() - file_start, 1)
+            print(f"File {filename} processed in {duration_s}s")
+
+            return {
+                "filename": filename,
+                "extraction": extraction_result,
+                "preview_images": preview_images,
+                "duration_seconds": duration_s,
+            }, True
+        finally:
+            # Clean up temp file
+            if filepath and os.path.exists(filepath):
+                os.remove(filepath)
+
     results = []
+    saved = []
     try:
-        for i, file in enumerate(files):
+        # Read every upload first (file streams belong to the request thread).
+        # Types the processor can decode from memory (images) skip the disk;
+        # the rest (PDFs, for pdftoppm) are spooled to a uniquely named temp file.
+        for file in files:
             if file and allowed_file(file.filename):
-                file_start = time.time()
-                print(f"Processing file: {file.filename}")
-
-                # Save file temporarily
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(filepath)
-
-                try:
-                    # Process document (extract text/image)
-                    document_content = process_document(filepath, file.mimetype, page_range)
-
-                    # Capture preview images (first 3 pages max) for the validation UI
-                    preview_images = []
-                    if document_content.get("type") == "pdf":
-                        pages = document_content.get("pages", [])
-                        preview_images = pages[:min(3, len(pages))]
-                    elif document_content.get("type") == "image":
-                        img_data = document_content.get("data")
-                        if img_data:
-                            preview_images = [img_data]
-
-                    # Extract structured data with Ollama
-                    extraction_result = extract_structured_data_with_ollama(
-                        document_content=document_content,
-                        fields_to_extract=fields_to_extract,
-                        additional_request=additional_request,
-                        document_type=document_type,
-                        system_prompt=system_prompt,
-                        filepath=filepath,
-                        mime_type=file.mimetype,
-                        extraction_strategy=extraction_strategy,
-                    )
-
-                    duration_s = round(time.time() - file_start, 1)
-                    print(f"File {filename} processed in {duration_s}s")
-
-                    results.append({
-                        "filename": filename,
-                        "extraction": extraction_result,
-                        "preview_images": preview_images,
-                        "duration_seconds": duration_s,
-                    })
-
-                finally:
-                    # Clean up temp file
-                    if os.path.exists(filepath):
-                        os.remove(filepath)
-                    
-                    # Cool down between multiple files in same request
-                    if i < len(files) - 1:
-                        batch_delay = get_batch_delay()
-                        print(f"Batch cooldown: unloading model + waiting {batch_delay}s before next file...")
-                        unload_ollama_model()
-                        time.sleep(batch_delay)
+                if supports_in_memory(file.mimetype):
+                    saved.append((filename, file.read(), file.mimetype))
+                    continue
+                with tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, suffix=os.path.splitext(filename)[1],
+                                                 delete=False, buffering=0) as fh:
+                    shutil.copyfileobj(file.stream, fh, length=UPLOAD_COPY_BUFFER)
+                filepath = fh.name
+                saved.append((filename, filepath, file.mimetype))
             else:
                 print(f"Invalid or not allowed file skipped: {file.filename}")
 
+        workers = min(get_extract_workers(), len(saved))
+        if workers > 1:
+            print(f"Processing {len(saved)} files with {workers} parallel workers")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(process_one, *info) for info in saved]
+                results = [future.result()[0] for future in futures]
+        else:
+            for i, info in enumerate(saved):
+                result, used_model = process_one(*info)
+                results.append(result)
+
+                # Cool down between multiple files in same request (not after a cache hit: no model call)
+                if used_model and i < len(saved) - 1:
+                    batch_delay = get_batch_delay()
+                    print(f"Batch cooldown: unloading model + waiting {batch_delay}s before next file...")
+                    unload_ollama_model()
+                    time.sleep(batch_delay)
+
         return jsonify(results), 200
 
     except Exception as e:
@@ -683,6 +793,10 @@ def extract_data_route():
         print(traceback.format_exc())
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
     finally:
+        # Remove uploads that were never processed (e.g. after an earlier failure)
+        for _, source, _ in saved:
+            if isinstance(source, str) and os.path.exists(source):
+                os.remove(source)
         # Restore original model if we did a per-request override
         if original_model is not None:
             os.environ['OLLAMA_MODEL'] = original_model
@@ -698,10 +812,9 @@ def export_excel():
         if not results:
             return jsonify({"error": "No results to export"}), 400
         
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Extraction Results"
+        # Create workbook (write-only: rows are streamed, no cell matrix kept in memory)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Extraction Results")
         
         # Collect unique fields while preserving order dynamically
         ordered_fields = []
@@ -722,17 +835,11 @@ def export_excel():
         
         # Create header row: Filename + fields + Validated + Confidence
         headers = ['Filename'] + ordered_fields + ['Validated', 'Confidence Score']
-        ws.append(headers)
-        
-        # Style header
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        # Column widths are tracked while rows are built (one pass over the values)
+        widths = [len(h) for h in headers]
         
-        # Add data rows
+        # Build data rows
+        rows = []
         for result in results:
             filename = result.get('filename', 'Unknown')
             validated = result.get('validated', False)
@@ -761,27 +868,38 @@ def export_excel():
             row.append('Yes' if validated else 'No')
             row.append(confidence)
             
-            ws.append(row)
+            for idx, value in enumerate(row):
+                widths[idx] = max(widths[idx], len(str(value)))
+            rows.append((row, validated))
+        
+        # Write-only sheets emit column widths before the first row
+        for idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = min(width + 2, 50)  # Max width 50
+        
+        # Styled header
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        header_alignment = Alignment(horizontal='center', vertical='center')
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
         
-        # Highlight validated rows in light green
+        # Data rows, validated ones highlighted in light green
         green_fill = PatternFill(start_color="E9F7EF", end_color="E9F7EF", fill_type="solid")
-        for row_idx, result in enumerate(results, start=2):
-            if result.get('validated', False):
-                for cell in ws[row_idx]:
+        for row, validated in rows:
+            if validated:
+                cells = []
+                for value in row:
+                    cell = WriteOnlyCell(ws, value=value)
                     cell.fill = green_fill
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Max width 50
-            ws.column_dimensions[column_letter].width = adjusted_width
+                    cells.append(cell)
+                row = cells
+            ws.append(row)
         
         # Save to BytesIO
         excel_file = io.BytesIO()
@@ -3,11 +3,76 @@ Primary families: GLM OCR, DeepSeek OCR, Gemma3, Llama Vision, LLaVA
 Categorized by hardware requirements; also exposes a family/tier mapping for UI selection.
 """
 
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass, field, replace
+from types import MappingProxyType
+
+
+_GB_RE = re.compile(r"\d+(?:\.\d+)?")
+
+def _parse_gb(text):
+    """Parse a catalog size such as "~7.9GB", "10-12GB" or "~400MB" into (min_gb, max_gb)"""
+    values = [float(v) for v in _GB_RE.findall(text)]
+    if not values:
+        return (0.0, 0.0)
+    if text.upper().endswith("MB"):
+        values = [v / 1024 for v in values]
+    return (values[0], values[-1])
+
+
+@dataclass(frozen=True, slots=True)
+class VisionModel:
+    """One catalog entry; serializes to the same JSON object as the original dict plus the parsed fields"""
+    name: str
+    display_name: str
+    size: str
+    vram: str
+    speed: str
+    accuracy: str
+    description: str
+    use_case: str
+    recommended: bool = False
+    # Numeric copies of size/vram, parsed once so fit checks never re-parse the strings
+    size_gb: float = field(init=False)
+    vram_min_gb: float = field(init=False)
+    vram_max_gb: float = field(init=False)
+
+    def __post_init__(self):
+        vram_min_gb, vram_max_gb = _parse_gb(self.vram)
+        object.__setattr__(self, "vram_min_gb", vram_min_gb)
+        object.__setattr__(self, "vram_max_gb", vram_max_gb)
+        object.__setattr__(self, "size_gb", _parse_gb(self.size)[1])
+
+    def as_dict(self):
+        """Plain-dict copy for callers that still expect the old dict entries"""
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class HardwareRecommendation:
+    """One HARDWARE_RECOMMENDATIONS entry; serializes to the same JSON object as the original dict"""
+    category: str
+    recommended_models: tuple
+    note: str
+    # VisionModel records for recommended_models, resolved at import; private so JSON keeps the names only
+    _models: tuple = field(default=(), repr=False, compare=False)
+
+    @property
+    def models(self):
+        """Catalog entries of the recommended models, in recommended_models order"""
+        return self._models
+
+    def as_dict(self):
+        """Plain-dict copy for callers that still expect the old dict entries"""
+        return {"category": self.category, "recommended_models": self.recommended_models, "note": self.note}
+
+
 VISION_MODELS = {
     # ========== LIGHTWEIGHT MODELS (No GPU or Low VRAM) ==========
     "lightweight": {
         "description": "Best for CPU-only or systems with very limited GPU memory (< 4GB VRAM)",
-        "models": [
+        "models": (
             {
                 "name": "glm-ocr:latest",
                 "display_name": "GLM-OCR",
@@ -29,13 +94,13 @@ VISION_MODELS = {
                 "description": "Ultra-lightweight Gemma3. Good for basic text extraction and very simple forms.",
                 "use_case": "Simple invoices and receipts on low-end hardware"
             }
-        ]
+        )
     },
 
     # ========== MEDIUM MODELS (6-8GB VRAM) ==========
     "medium": {
         "description": "Best for systems with moderate GPU memory (6-8GB VRAM)",
-        "models": [
+        "models": (
             {
                 "name": "deepseek-ocr:latest",
                 "display_name": "DeepSeek OCR (Latest)",
@@ -111,13 +176,13 @@ VISION_MODELS = {
                 "description": "Classic LLaVA, well-tested for documents and OCR-like tasks.",
                 "use_case": "General document extraction"
             }
-        ]
+        )
     },
 
     # ========== LARGE MODELS (12-16GB VRAM) ==========
     "large": {
         "description": "Best for systems with high-end GPU (12-16GB VRAM)",
-        "models": [
+        "models": (
             {
                 "name": "llama3.2-vision:11b",
                 "display_name": "Llama 3.2 Vision 11B",
@@ -149,13 +214,13 @@ VISION_MODELS = {
                 "description": "Larger LLaVA for better OCR/document accuracy.",
                 "use_case": "Complex document analysis"
             }
-        ]
+        )
     },
 
     # ========== PROFESSIONAL MODELS (24GB+ VRAM) ==========
     "professional": {
         "description": "Best for high-end workstations (24GB+ VRAM) or multi-GPU setups",
-        "models": [
+        "models": (
             {
                 "name": "gemma3:27b",
                 "display_name": "Gemma3 27B",
@@ -187,134 +252,225 @@ VISION_MODELS = {
                 "description": "Meta's largest vision model with exceptional reasoning.",
                 "use_case": "Enterprise: complex legal/financial documents"
             }
-        ]
+        )
     }
 }
 
 # Hardware recommendations summary
 HARDWARE_RECOMMENDATIONS = {
-    "cpu_only": {
-        "category": "lightweight",
-        "recommended_models": ["gemma3:270m"],
-        "note": "CPU-only processing will be slow. Consider at least 16GB RAM."
-    },
-    "gpu_4gb": {
-        "category": "lightweight",
-        "recommended_models": ["glm-ocr:latest", "gemma3:270m"],
-        "note": "GLM-OCR fits comfortably in 4GB and benchmarks #1 for OCR."
-    },
-    "gpu_6gb": {
-        "category": "medium",
-        "recommended_models": ["glm-ocr:latest", "deepseek-ocr:latest", "qwen3.5:4b", "gemma3:4b"],
-        "note": "GLM-OCR is the best OCR choice; qwen3.5:4b is excellent for JSON extraction."
-    },
-    "gpu_8gb": {
-        "category": "medium",
-        "recommended_models": ["glm-ocr:latest", "qwen3.5:9b", "deepseek-ocr:latest", "gemma3:4b"],
-        "note": "qwen3.5:9b is highly recommended for all-around accuracy. GLM-OCR for pure OCR."
-    },
-    "gpu_12gb": {
-        "category": "large",
-        "recommended_models": ["qwen3.5:9b", "llama3.2-vision:11b", "glm-ocr:latest", "gemma3:12b"],
-        "note": "qwen3.5:9b is the best balanced choice; llama3.2-vision:11b for complex reasoning."
-    },
-    "gpu_16gb": {
-        "category": "large",
-        "recommended_models": ["llama3.2-vision:11b", "gemma3:12b"],
-        "note": "Excellent performance for complex documents."
-    },
-    "gpu_24gb": {
-        "category": "professional",
-        "recommended_models": ["qwen3.5:27b", "gemma3:27b"],
-        "note": "qwen3.5:27b offers exceptional accuracy for complex documents."
-    },
-    "gpu_48gb_plus": {
-        "category": "professional",
-        "recommended_models": ["llama3.2-vision:90b"],
-        "note": "Enterprise-grade, maximum accuracy for critical applications."
-    }
+    "cpu_only": HardwareRecommendation(
+        category="lightweight",
+        recommended_models=("gemma3:270m",),
+        note="CPU-only processing will be slow. Consider at least 16GB RAM."
+    ),
+    "gpu_4gb": HardwareRecommendation(
+        category="lightweight",
+        recommended_models=("glm-ocr:latest", "gemma3:270m"),
+        note="GLM-OCR fits comfortably in 4GB and benchmarks #1 for OCR."
+    ),
+    "gpu_6gb": HardwareRecommendation(
+        category="medium",
+        recommended_models=("glm-ocr:latest", "deepseek-ocr:latest", "qwen3.5:4b", "gemma3:4b"),
+        note="GLM-OCR is the best OCR choice; qwen3.5:4b is excellent for JSON extraction."
+    ),
+    "gpu_8gb": HardwareRecommendation(
+        category="medium",
+        recommended_models=("glm-ocr:latest", "qwen3.5:9b", "deepseek-ocr:latest", "gemma3:4b"),
+        note="qwen3.5:9b is highly recommended for all-around accuracy. GLM-OCR for pure OCR."
+    ),
+    "gpu_12gb": HardwareRecommendation(
+        category="large",
+        recommended_models=("qwen3.5:9b", "llama3.2-vision:11b", "glm-ocr:latest", "gemma3:12b"),
+        note="qwen3.5:9b is the best balanced choice; llama3.2-vision:11b for complex reasoning."
+    ),
+    "gpu_16gb": HardwareRecommendation(
+        category="large",
+        recommended_models=("llama3.2-vision:11b", "gemma3:12b"),
+        note="Excellent performance for complex documents."
+    ),
+    "gpu_24gb": HardwareRecommendation(
+        category="professional",
+        recommended_models=("qwen3.5:27b", "gemma3:27b"),
+        note="qwen3.5:27b offers exceptional accuracy for complex documents."
+    ),
+    "gpu_48gb_plus": HardwareRecommendation(
+        category="professional",
+        recommended_models=("llama3.2-vision:90b",),
+        note="Enterprise-grade, maximum accuracy for critical applications."
+    )
 }
 
 def get_models_by_category(category):
     """Get all models in a specific category"""
-    return VISION_MODELS.get(category, {}).get("models", [])
+    return VISION_MODELS[category]["models"] if category in VISION_MODELS else ()
+
+# Upper VRAM bound (inclusive, GB) of each GPU tier; anything above the last one is 48GB+
+_VRAM_LIMITS = (4, 6, 8, 12, 16, 24)
+_VRAM_KEYS = ("gpu_4gb", "gpu_6gb", "gpu_8gb", "gpu_12gb", "gpu_16gb", "gpu_24gb", "gpu_48gb_plus")
 
 def get_recommended_models_by_vram(vram_gb):
     """Get recommended models based on available VRAM"""
     if vram_gb == 0:  # CPU only
         return HARDWARE_RECOMMENDATIONS["cpu_only"]
-    elif vram_gb <= 4:
-        return HARDWARE_RECOMMENDATIONS["gpu_4gb"]
-    elif vram_gb <= 6:
-        return HARDWARE_RECOMMENDATIONS["gpu_6gb"]
-    elif vram_gb <= 8:
-        return HARDWARE_RECOMMENDATIONS["gpu_8gb"]
-    elif vram_gb <= 12:
-        return HARDWARE_RECOMMENDATIONS["gpu_12gb"]
-    elif vram_gb <= 16:
-        return HARDWARE_RECOMMENDATIONS["gpu_16gb"]
-    elif vram_gb <= 24:
-        return HARDWARE_RECOMMENDATIONS["gpu_24gb"]
-    else:
-        return HARDWARE_RECOMMENDATIONS["gpu_48gb_plus"]
+    return _VRAM_BUCKETS[bisect_left(_VRAM_LIMITS, vram_gb)]
+
+def recommend_bulk(vram_gbs):
+    """Get the recommendation entry for each VRAM size in vram_gbs (e.g. every GPU on a multi-GPU host)"""
+    cpu_only = HARDWARE_RECOMMENDATIONS["cpu_only"]
+    return [cpu_only if v == 0 else _VRAM_BUCKETS[bisect_left(_VRAM_LIMITS, v)] for v in vram_gbs]
 
 def get_all_model_names():
-    """Get list of all model names for validation"""
-    all_models = []
-    for category in VISION_MODELS.values():
-        for model in category.get("models", []):
-            all_models.append(model["name"])
-    return all_models
+    """Get all model names for validation (a set-like view, O(1) membership)"""
+    return _MODEL_BY_NAME.keys()
 
-def get_family_tiers():
-    """Return the family->tiers mapping used by the UI"""
-    return {
-        "gemma3": {
-            "label": "Gemma3",
-            "tiers": {
-                "small": "gemma3:4b",
-                "medium": "gemma3:12b",
-                "large": "gemma3:27b"
-            }
-        },
-        "llama": {
-            "label": "Llama 3.2 Vision",
-            "tiers": {
-                "small": None,  # No small variant available
-                "medium": "llama3.2-vision:11b",
-                "large": "llama3.2-vision:90b"
-            }
-        },
-        "llava": {
-            "label": "LLaVA (OCR-oriented)",
-            "tiers": {
-                "small": "llava-phi3:3.8b",
-                "medium": "llava:7b",
-                "large": "llava:13b"
-            }
-        },
-        "glm_ocr": {
-            "label": "GLM-OCR (#1 OmniDocBench)",
-            "tiers": {
-                "small": "glm-ocr:latest",
-                "medium": None,
-                "large": None
-            }
-        },
-        "deepseek_ocr": {
-            "label": "DeepSeek OCR",
-            "tiers": {
-                "small": None,
-                "medium": "deepseek-ocr:latest",
-                "large": None
-            }
-        },
-        "qwen3vl": {
-            "label": "Qwen3 VL / 3.5",
-            "tiers": {
-                "small": "qwen3.5:4b",
-                "medium": "qwen3.5:9b",
-                "large": "qwen3.5:27b"
-            }
+def get_model(name):
+    """Get the catalog entry for a model name, or None if it is not in the catalog"""
+    return _MODEL_BY_NAME.get(name)
+
+def get_category_of(name):
+    """Get the hardware category a catalog model belongs to, or None"""
+    return _CATEGORY_BY_NAME.get(name)
+
+def models_fitting(vram_gb, category=None):
+    """Get the names of catalog models whose upper VRAM estimate fits in vram_gb, optionally within one category"""
+    return [
+        name for name, cat, vram_max in zip(_NAMES, _CATEGORY, _VRAM_MAX)
+        if vram_max <= vram_gb and (category is None or cat == category)
+    ]
+
+def get_best_fit_model(vram_gb, family=None):
+    """Get the catalog entry of the largest model (by upper VRAM estimate) that fits in vram_gb.
+    family restricts the pick to one get_family_tiers() key; returns None if nothing fits.
+    """
+    vram_max = _VRAM_MAX_BY_FAMILY.get(family)
+    if vram_max is None:
+        return None
+    idx = bisect_right(vram_max, vram_gb) - 1
+    return _BY_FAMILY[family][idx] if idx >= 0 else None
+
+# Family -> tiers mapping used by the UI (static; read-only views, see below)
+_FAMILY_TIERS = {
+    "gemma3": {
+        "label": "Gemma3",
+        "tiers": {
+            "small": "gemma3:4b",
+            "medium": "gemma3:12b",
+            "large": "gemma3:27b"
+        }
+    },
+    "llama": {
+        "label": "Llama 3.2 Vision",
+        "tiers": {
+            "small": None,  # No small variant available
+            "medium": "llama3.2-vision:11b",
+            "large": "llama3.2-vision:90b"
+        }
+    },
+    "llava": {
+        "label": "LLaVA (OCR-oriented)",
+        "tiers": {
+            "small": "llava-phi3:3.8b",
+            "medium": "llava:7b",
+            "large": "llava:13b"
+        }
+    },
+    "glm_ocr": {
+        "label": "GLM-OCR (#1 OmniDocBench)",
+        "tiers": {
+            "small": "glm-ocr:latest",
+            "medium": None,
+            "large": None
+        }
+    },
+    "deepseek_ocr": {
+        "label": "DeepSeek OCR",
+        "tiers": {
+            "small": None,
+            "medium": "deepseek-ocr:latest",
+            "large": None
+        }
+    },
+    "qwen3vl": {
+        "label": "Qwen3 VL / 3.5",
+        "tiers": {
+            "small": "qwen3.5:4b",
+            "medium": "qwen3.5:9b",
+            "large": "qwen3.5:27b"
         }
     }
+}
+# Shared by every caller, so expose it read-only all the way down
+_FAMILY_TIERS = MappingProxyType({
+    key: MappingProxyType({**fam, "tiers": MappingProxyType(fam["tiers"])})
+    for key, fam in _FAMILY_TIERS.items()
+})
+
+def get_family_tiers():
+    """Return the family->tiers mapping used by the UI"""
+    return _FAMILY_TIERS
+
+
+# ========== IMPORT-TIME LOOKUPS (the catalog is static) ==========
+# Every category has a "models" list and every family a "tiers" map, so lookups below subscript directly
+if not all("models" in cat for cat in VISION_MODELS.values()):
+    raise ValueError("every VISION_MODELS category needs a 'models' list")
+if not all("tiers" in fam for fam in _FAMILY_TIERS.values()):
+    raise ValueError("every family needs a 'tiers' map")
+
+_MODEL_BY_NAME = {}
+_CATEGORY_BY_NAME = {}
+for _category, _cat in VISION_MODELS.items():
+    # The catalog above is written as dict literals for readability; store it as VisionModel records
+    _cat["models"] = tuple(VisionModel(**m) for m in _cat["models"])
+    for _model in _cat["models"]:
+        _MODEL_BY_NAME[_model.name] = _model
+        _CATEGORY_BY_NAME[_model.name] = _category
+
+def _validate():
+    """Check cross-references between the tables once, so queries can subscript without fallbacks.
+    Raises ValueError (not assert, so it still runs under python -O)."""
+    if len(_MODEL_BY_NAME) != sum(len(cat["models"]) for cat in VISION_MODELS.values()):
+        raise ValueError("duplicate model name in VISION_MODELS")
+    for model in _MODEL_BY_NAME.values():
+        if not (model.vram_max_gb > 0 and model.size_gb > 0):
+            raise ValueError(f"unparseable size/vram for {model.name}")
+    for key, rec in HARDWARE_RECOMMENDATIONS.items():
+        if rec.category not in VISION_MODELS:
+            raise ValueError(f"{key}: unknown category {rec.category!r}")
+        for name in rec.recommended_models:
+            if name not in _MODEL_BY_NAME:
+                raise ValueError(f"{key}: {name!r} is not in VISION_MODELS")
+    if tuple(HARDWARE_RECOMMENDATIONS) != ("cpu_only",) + _VRAM_KEYS:
+        raise ValueError("VRAM tiers out of sync")
+    for family_key, fam in _FAMILY_TIERS.items():
+        for tier, name in fam["tiers"].items():
+            if name is not None and name not in _MODEL_BY_NAME:
+                raise ValueError(f"{family_key}/{tier}: {name!r} is not in VISION_MODELS")
+
+_validate()
+
+# Point each recommendation at the catalog records it names (no per-access name lookup)
+for _key, _rec in HARDWARE_RECOMMENDATIONS.items():
+    HARDWARE_RECOMMENDATIONS[_key] = replace(_rec, _models=tuple(_MODEL_BY_NAME[n] for n in _rec.recommended_models))
+_VRAM_BUCKETS = tuple(HARDWARE_RECOMMENDATIONS[k] for k in _VRAM_KEYS)
+
+# Flat parallel columns (catalog order) for filter queries that only need one or two fields
+_NAMES = tuple(_MODEL_BY_NAME)
+_CATEGORY = tuple(_CATEGORY_BY_NAME[n] for n in _NAMES)
+_VRAM_MAX = tuple(_MODEL_BY_NAME[n].vram_max_gb for n in _NAMES)
+
+# Models sorted by vram_max_gb, per family (None = whole catalog), for best-fit bisection
+_BY_FAMILY = {None: tuple(sorted(_MODEL_BY_NAME.values(), key=lambda m: m.vram_max_gb))}
+for _family_key, _fam in _FAMILY_TIERS.items():
+    _BY_FAMILY[_family_key] = tuple(sorted(
+        (_MODEL_BY_NAME[n] for n in _fam["tiers"].values() if n is not None),
+        key=lambda m: m.vram_max_gb,
+    ))
+_VRAM_MAX_BY_FAMILY = {k: tuple(m.vram_max_gb for m in ms) for k, ms in _BY_FAMILY.items()}
+
+# (family_key, tier) -> (model name or None, catalog metadata or None), in UI order
+FAMILY_TIER_META = {
+    (family_key, tier): (model_name, _MODEL_BY_NAME[model_name] if model_name else None)
+    for family_key, fam in get_family_tiers().items()
+    for tier, model_name in fam["tiers"].items()
+}
@@ -1,12 +1,52 @@
 import os
+import re
 import json
 import base64
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-import PyPDF2
-from pdf2image import convert_from_path
-from PIL import Image, ImageEnhance, ImageFilter
+from pdf2image import convert_from_path, pdfinfo_from_path
+try:
+    import pymupdf  # optional: renders PDFs in-process instead of spawning pdftoppm
+except ImportError:
+    pymupdf = None
+from PIL import Image, ImageEnhance, ImageFilter, ImageStat
 import io
+import copy
+import contextlib
+import hashlib
+import tempfile
+import logging
+import threading
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+# Model families (from /api/show details) that accept image input
+KNOWN_VISION_FAMILIES = frozenset({
+    'mllama', 'llava', 'bakllava', 'qwen3vl', 'qwen2vl',
+    'deepseekocr', 'deepseek-ocr', 'deepseek-vl', 'glm-ocr',
+    'gemma3', 'llama4',
+})
+
+# Name keywords that mark a vision model (covers bakllava, deepseek-vl, qwen*-vl, ...)
+VISION_NAME_RE = re.compile(r'vision|llava|-vl|deepseek-ocr|glm-ocr', re.IGNORECASE)
+
+# Shared HTTP session for every Ollama call (also used by app.py): keep-alive sockets are
+# reused across pages/requests. Only connection failures are retried; read=0 so a long
+# generate that already reached Ollama is never sent twice.
+OLLAMA_SESSION = requests.Session()
+_ollama_adapter = HTTPAdapter(
+    pool_connections=10, pool_maxsize=20,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.2)
+)
+OLLAMA_SESSION.mount('http://', _ollama_adapter)
+OLLAMA_SESSION.mount('https://', _ollama_adapter)
+# Image-bearing bodies are serialized once with orjson and sent as bytes (see _post_json)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
 # Configuration is read dynamically from environment to allow runtime changes
 def get_ollama_base_url():
@@ -36,6 +76,11 @@ def get_skip_image_enhance():
     return os.getenv("SKIP_IMAGE_ENHANCE", "false").lower() in ("true", "1", "yes")
 
 
+def get_grayscale_images():
+    """Whether to send pages/images to the model as grayscale JPEG (much smaller payload)."""
+    return os.getenv("GRAYSCALE_IMAGES", "false").lower() in ("true", "1", "yes")
+
+
 def get_batch_delay():
     """Delay in seconds between batch file processing."""
     try:
@@ -44,6 +89,78 @@ def get_batch_delay():
         return 5.0
 
 
+def get_extract_workers():
+    """Number of uploaded files processed in parallel by a single /extract call.
+    Default 1 keeps files sequential with the BATCH_DELAY cooldown between them;
+    raise it when Ollama serves parallel requests (OLLAMA_NUM_PARALLEL).
+    """
+    try:
+        return max(1, int(os.getenv("EXTRACT_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+
+def get_page_workers():
+    """Pages of one document sent to Ollama in parallel.
+    Default 1 (sequential); raise it together with Ollama's OLLAMA_NUM_PARALLEL.
+    """
+    try:
+        return max(1, int(os.getenv("PAGE_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+
+def get_pdf_threads():
+    """Threads used per PDF: pdftoppm processes for rasterizing plus page encode workers.
+    Default: up to 4, bounded by the CPU count.
+    """
+    try:
+        return max(1, int(os.getenv("PDF_THREADS", str(min(4, os.cpu_count() or 1)))))
+    except ValueError:
+        return 1
+
+
+def get_blur_threshold():
+    """Minimum Laplacian variance (edge energy) a rendered PDF page needs to be sent to the model.
+    Pages below it are treated as blank/unreadable and skipped. Default 0 (off): sparse pages
+    with a line or two of text score low too, so tune it on your own scans.
+    """
+    try:
+        return max(0.0, float(os.getenv("BLUR_THRESHOLD", "0")))
+    except ValueError:
+        return 0.0
+
+
+def get_target_page_kb():
+    """JPEG size (KB) above which a page/image is re-encoded once at a lower quality.
+    Default 400; 0 disables the second pass.
+    """
+    try:
+        return max(0, int(os.getenv("TARGET_PAGE_KB", "400")))
+    except ValueError:
+        return 400
+
+
+def get_page_cache_size():
+    """Page extraction results kept in memory, so an identical page (same image, model and
+    prompt) is not sent to the model again. Default 64; 0 disables the cache.
+    """
+    try:
+        return max(0, int(os.getenv("PAGE_CACHE_SIZE", "64")))
+    except ValueError:
+        return 64
+
+
+def get_document_cache_size():
+    """Whole-document results kept in memory, so re-submitting the same file with the same
+    model and options skips rendering and Ollama entirely. Default 32; 0 disables the cache.
+    """
+    try:
+        return max(0, int(os.getenv("DOCUMENT_CACHE_SIZE", "32")))
+    except ValueError:
+        return 32
+
+
 def get_ollama_keep_alive():
     """How long Ollama keeps the model loaded after a request.
     Shorter = less VRAM wasted by idle models, but slower cold-start.
@@ -52,6 +169,40 @@ def get_ollama_keep_alive():
     return os.getenv("OLLAMA_KEEP_ALIVE", "2m")
 
 
+def _post_json(url, body, **kwargs):
+    """POST a JSON body to Ollama. body may be pre-encoded bytes (reused across retries) or a dict,
+    which is serialized with orjson: one bytes object instead of json.dumps' str + utf-8 copy."""
+    if not isinstance(body, bytes):
+        body = orjson.dumps(body)
+    return OLLAMA_SESSION.post(url, data=body, headers=_JSON_HEADERS, **kwargs)
+
+
+# Extractions currently running in this process (app.py counts them inside OLLAMA_SEMAPHORE)
+_active_extractions = 0
+_active_extractions_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def track_extraction():
+    """Mark one extraction as in flight for the duration of the with-block."""
+    global _active_extractions
+    with _active_extractions_lock:
+        _active_extractions += 1
+    try:
+        yield
+    finally:
+        with _active_extractions_lock:
+            _active_extractions -= 1
+
+
+def _can_unload_for_retry():
+    """Unloading before a retry is only safe when nothing else may be generating with the model:
+    this is the only extraction in flight and its pages run one at a time."""
+    with _active_extractions_lock:
+        active = _active_extractions
+    return active <= 1 and get_page_workers() == 1
+
+
 def unload_ollama_model():
     """Force Ollama to unload the current model from VRAM.
     This prevents multiple model instances from competing for VRAM
@@ -60,17 +211,17 @@ def unload_ollama_model():
     try:
         base_url = get_ollama_base_url()
         model = get_ollama_model()
-        print(f"[VRAM cleanup] Unloading model {model} from VRAM...")
-        requests.post(
+        logger.info("[VRAM cleanup] Unloading model %s from VRAM...", model)
+        OLLAMA_SESSION.post(
             f"{base_url}/api/generate",
             json={"model": model, "prompt": "", "keep_alive": 0},
             timeout=10
         )
         import time as _time
         _time.sleep(2)  # Give Ollama time to release VRAM
-        print(f"[VRAM cleanup] Model unloaded")
+        logger.info("[VRAM cleanup] Model unloaded")
     except Exception as e:
-        print(f"[VRAM cleanup] Warning: could not unload model: {e}")
+        logger.warning("[VRAM cleanup] could not unload model: %s", e)
 
 
 def is_deepseek_ocr_model(model_name):
@@ -108,22 +259,36 @@ def strip_thinking_tags(text):
     return text.strip()
 
 
-def process_document(filepath, mime_type, page_range="all"):
+def supports_in_memory(mime_type):
+    """True if process_document can read this type from bytes / a file-like object.
+    PDFs still need a real file on disk because pdftoppm is handed a path.
+    """
+    return mime_type.startswith('image/')
+
+
+def process_document(source, mime_type, page_range="all"):
     """
     Process document based on type:
     - Images: return as base64
     - PDFs: convert to images and return as base64 array
+    source is a file path, or bytes / a binary file-like object for types where
+    supports_in_memory(mime_type) is True.
     """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
     if mime_type.startswith('image/'):
-        return process_image(filepath)
+        return process_image(source)
     elif mime_type == 'application/pdf':
-        return process_pdf(filepath, page_range)
+        if not isinstance(source, (str, os.PathLike)):
+            raise ValueError("PDF processing needs a file path (pdftoppm cannot read from memory)")
+        return process_pdf(source, page_range)
     else:
         raise ValueError(f"Unsupported file type: {mime_type}")
 
 
 def process_image(image_path):
-    """Process image file with optional enhancement for better OCR and return base64 encoded"""
+    """Process image file with optional enhancement for better OCR and return base64 encoded.
+    image_path may also be a binary file-like object (e.g. an in-memory upload)."""
     try:
         with Image.open(image_path) as img:
             # Convert to RGB if necessary
@@ -137,29 +302,51 @@ def process_image(image_path):
                 ratio = max_width / img.width
                 new_height = int(img.height * ratio)
                 img = img.resize((max_width, new_height), Image.LANCZOS)
-                print(f"Resized image to {max_width}x{new_height}")
+                logger.debug("Resized image to %sx%s", max_width, new_height)
             
             # Apply image enhancement only if not skipped
             if not get_skip_image_enhance():
                 img = enhance_image_for_ocr(img)
             else:
-                print("[SKIP_IMAGE_ENHANCE] Skipping contrast/sharpness enhancement")
+                logger.debug("[SKIP_IMAGE_ENHANCE] Skipping contrast/sharpness enhancement")
+            
+            grayscale = get_grayscale_images()
+            if grayscale:
+                img = img.convert('L')
             
-            # Save to buffer
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=85, optimize=True)
-            buffer.seek(0)
+            # Save to buffer (grayscale JPEGs hold up fine at a lower quality)
+            buffer = encode_jpeg(img, 80 if grayscale else 85)
             
-            base64_image = base64.b64encode(buffer.read()).decode('utf-8')
+            # Encode straight from the buffer's memory (no read() copy); base64 is pure ASCII
+            base64_image = base64.b64encode(buffer.getbuffer()).decode('ascii')
             return {
                 "type": "image",
                 "data": base64_image
             }
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error processing image: %s", e)
         raise
 
 
+# Quality used for the second pass when the first encode is over TARGET_PAGE_KB
+FALLBACK_JPEG_QUALITY = 75
+
+
+def encode_jpeg(img, quality):
+    """Encode img as JPEG into a BytesIO. Dense pages that come out over TARGET_PAGE_KB are
+    re-encoded once at FALLBACK_JPEG_QUALITY, which is still plenty for OCR."""
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    target_kb = get_target_page_kb()
+    if target_kb and quality > FALLBACK_JPEG_QUALITY and buffer.tell() > target_kb * 1024:
+        first_kb = buffer.tell() / 1024
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=FALLBACK_JPEG_QUALITY, optimize=True)
+        logger.debug("JPEG %.0f KB > %s KB at q=%s, re-encoded at q=%s: %.0f KB",
+                     first_kb, target_kb, quality, FALLBACK_JPEG_QUALITY, buffer.tell() / 1024)
+    return buffer
+
+
 def enhance_image_for_ocr(img):
     """
     Enhance image for better OCR results, especially for handwritten text.
@@ -180,12 +367,42 @@ def enhance_image_for_ocr(img):
     return img
 
 
+# 3x3 Laplacian, offset to mid-grey so negative responses are not clipped to 0 in an 'L' image
+_LAPLACIAN = ImageFilter.Kernel((3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128)
+
+
+def laplacian_variance(img):
+    """Variance of the Laplacian of the page: ~0 for blank pages, low for blurry ones."""
+    edges = img.convert('L').filter(_LAPLACIAN)
+    width, height = edges.size
+    # PIL leaves the 1px border unfiltered; leave it out of the statistics
+    return ImageStat.Stat(edges.crop((1, 1, width - 1, height - 1))).var[0]
+
+
+def _drop_unreadable_pages(images, threshold):
+    """Filter out pages whose Laplacian variance is below threshold (all are kept if none pass).
+    Returns (kept images, their 1-based page numbers in the PDF)."""
+    kept = []
+    page_numbers = []
+    for i, image in enumerate(images):
+        score = laplacian_variance(image)
+        if score < threshold:
+            logger.info("Skipping page %s: blank or too blurry (Laplacian variance %.1f < %s)", i+1, score, threshold)
+        else:
+            kept.append(image)
+            page_numbers.append(i + 1)
+    if not kept:
+        logger.warning("every page is below BLUR_THRESHOLD, sending them anyway")
+        return images, list(range(1, len(images) + 1))
+    return kept, page_numbers
+
+
 def downscale_base64_image(base64_image, max_width=1152, jpeg_quality=85):
     """Downscale a base64 image and return a lighter base64 payload."""
     try:
         image_bytes = base64.b64decode(base64_image)
         with Image.open(io.BytesIO(image_bytes)) as img:
-            if img.mode != 'RGB':
+            if img.mode not in ('RGB', 'L'):  # keep grayscale pages grayscale
                 img = img.convert('RGB')
 
             if img.width > max_width:
@@ -195,10 +412,9 @@ def downscale_base64_image(base64_image, max_width=1152, jpeg_quality=85):
 
             output = io.BytesIO()
             img.save(output, format='JPEG', quality=jpeg_quality, optimize=True)
-            output.seek(0)
-            return base64.b64encode(output.read()).decode('utf-8')
+            return base64.b64encode(output.getbuffer()).decode('ascii')
     except Exception as e:
-        print(f"Warning: could not downscale image payload: {e}")
+        logger.warning("could not downscale image payload: %s", e)
         return base64_image
 
 
@@ -212,15 +428,9 @@ def process_pdf(pdf_path, page_range="all"):
         deepseek_mode = is_deepseek_ocr_model(model_name)
         max_width = get_image_max_width()
         skip_enhance = get_skip_image_enhance()
+        grayscale = get_grayscale_images()
 
-        print(f"Converting PDF to images: {pdf_path}")
-        # Use lower DPI for smaller target widths to avoid wasting CPU
-        if max_width <= 1024:
-            pdf_dpi = 200
-        elif deepseek_mode:
-            pdf_dpi = 220
-        else:
-            pdf_dpi = 300
+        logger.info("Converting PDF to images: %s", pdf_path)
         
         last_page = None
         if page_range == "first":
@@ -231,75 +441,181 @@ def process_pdf(pdf_path, page_range="all"):
             except ValueError:
                 pass
                 
-        images = convert_from_path(pdf_path, dpi=pdf_dpi, last_page=last_page)
-        print(f"PDF converted to {len(images)} page(s)")
-        
-        # Limit pages to avoid huge payloads
+        pdf_threads = get_pdf_threads()
+        # Moderate quality (smaller payload); grayscale pages need less
+        jpeg_quality = 80 if deepseek_mode or grayscale else 85
+        skipped_pages = {}
+
+        # Limit pages to avoid huge payloads; pages past the limit are never rendered
         MAX_PAGES = 10
-        if len(images) > MAX_PAGES:
-            print(f"WARNING: PDF has {len(images)} pages, processing only first {MAX_PAGES}")
-            images = images[:MAX_PAGES]
+        capped = last_page is None or last_page > MAX_PAGES
+        if capped:
+            last_page = MAX_PAGES
+
+        if skip_enhance:
+            # No PIL work needed: pdftoppm writes the final JPEGs, sent without a decode + re-encode
+            logger.debug("[SKIP_IMAGE_ENHANCE] Sending pdftoppm JPEG output as-is")
+            base64_images, page_count = _render_pdf_jpegs(
+                pdf_path, max_width, last_page, pdf_threads, jpeg_quality, grayscale
+            )
+            if capped and len(base64_images) == MAX_PAGES:
+                _warn_if_truncated(pdf_path, page_count, MAX_PAGES)
+        else:
+            if pymupdf is not None:
+                images, page_count = _render_pdf_pymupdf(pdf_path, max_width, last_page, grayscale=False)
+            else:
+                # Let pdftoppm rasterize straight at the target width (no oversized render + resize)
+                images = convert_from_path(
+                    pdf_path, size=(max_width, None), last_page=last_page, thread_count=pdf_threads
+                )
+                page_count = None
+            logger.info("PDF converted to %s page(s)", len(images))
+            if capped and len(images) == MAX_PAGES:
+                _warn_if_truncated(pdf_path, page_count, MAX_PAGES)
+
+            blur_threshold = get_blur_threshold()
+            if blur_threshold:
+                page_count = len(images)
+                images, page_numbers = _drop_unreadable_pages(images, blur_threshold)
+                if len(images) < page_count:
+                    # Keep the PDF's own numbering for prompts, labels and errors
+                    skipped_pages = {"page_numbers": page_numbers, "page_count": page_count}
         
-        base64_images = []
-        for i, image in enumerate(images):
-            print(f"Processing page {i+1}/{len(images)}...")
-            
-            # Resize image to target width directly (no upscale→downscale cycle)
-            if image.width > max_width:
-                ratio = max_width / image.width
-                new_height = int(image.height * ratio)
-                image = image.resize((max_width, new_height), Image.LANCZOS)
-                print(f"Resized page {i+1} to {max_width}x{new_height}")
+            total = len(images)
+
+            def encode_page(i, image):
+                logger.debug("Processing page %s/%s...", i+1, total)
             
-            # Apply OCR enhancement only if not skipped
-            if not skip_enhance:
-                image = enhance_image_for_ocr(image)
-            else:
-                print(f"[SKIP_IMAGE_ENHANCE] Skipping enhancement for page {i+1}")
+                # Apply OCR enhancement only if not skipped
+                if not skip_enhance:
+                    image = enhance_image_for_ocr(image)
+                else:
+                    logger.debug("[SKIP_IMAGE_ENHANCE] Skipping enhancement for page %s", i+1)
             
-            # Save temporarily with moderate quality (smaller payload)
-            jpeg_quality = 80 if deepseek_mode else 85
-            temp_image_path = f"{pdf_path}_page_{i}.jpg"
-            image.save(temp_image_path, 'JPEG', quality=jpeg_quality, optimize=True)
+                if grayscale:
+                    image = image.convert('L')
             
-            # Convert to base64
-            with open(temp_image_path, 'rb') as img_file:
-                image_data = img_file.read()
-                base64_image = base64.b64encode(image_data).decode('utf-8')
-                base64_images.append(base64_image)
-                
-                # Show size info
-                size_kb = len(image_data) / 1024
-                print(f"Page {i+1} encoded: {size_kb:.1f} KB ({len(base64_image)} chars base64)")
-            
-            # Clean up temp image
-            os.remove(temp_image_path)
+                # Encode in memory
+                buffer = encode_jpeg(image, jpeg_quality)
+
+                # Convert to base64 straight from the buffer's memory (no getvalue() copy)
+                base64_image = base64.b64encode(buffer.getbuffer()).decode('ascii')
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    size_kb = buffer.tell() / 1024
+                    logger.debug("Page %s encoded: %.1f KB (%s chars base64)", i+1, size_kb, len(base64_image))
+                return base64_image
+
+            # PIL releases the GIL while enhancing/encoding, so threads scale across cores
+            if pdf_threads > 1 and total > 1:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=min(pdf_threads, total)) as executor:
+                    base64_images = list(executor.map(encode_page, range(total), images))
+            else:
+                base64_images = [encode_page(i, image) for i, image in enumerate(images)]
         
         # Calculate total payload size
         total_size_mb = sum(len(img) for img in base64_images) / (1024 * 1024)
-        print(f"PDF processing complete: {len(base64_images)} images, total ~{total_size_mb:.2f} MB")
+        logger.info("PDF processing complete: %s images, total ~%.2f MB", len(base64_images), total_size_mb)
         
         return {
             "type": "pdf",
-            "pages": base64_images
+            "pages": base64_images,
+            **skipped_pages
         }
     except Exception as e:
-        print(f"Error processing PDF: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing PDF: %s", e)
         raise
 
 
-def merge_page_results(page_extractions, fields_to_extract):
+# PyMuPDF does not support multithreaded use (gthread workers, EXTRACT_WORKERS): one render at a time
+_PYMUPDF_LOCK = threading.Lock()
+
+
+def _render_pdf_pymupdf(pdf_path, max_width, last_page, grayscale, jpeg_quality=None):
+    """Render pages (up to last_page) in-process with PyMuPDF, scaled straight to max_width.
+    Returns (pages, total page count of the PDF); pages are JPEG bytes when jpeg_quality is
+    given, else PIL images. Every PyMuPDF call happens under _PYMUPDF_LOCK; only plain
+    bytes/PIL images leave this function."""
+    colorspace = pymupdf.csGRAY if grayscale else pymupdf.csRGB
+    pages = []
+    with _PYMUPDF_LOCK, pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+        render_count = page_count if last_page is None else min(last_page, page_count)
+        for page in doc.pages(0, render_count):
+            zoom = max_width / page.rect.width
+            pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+            if jpeg_quality is None:
+                pages.append(Image.frombytes('L' if grayscale else 'RGB', (pix.width, pix.height), pix.samples))
+            else:
+                pages.append(pix.tobytes("jpeg", jpg_quality=jpeg_quality))
+    return pages, page_count
+
+
+def _warn_if_truncated(pdf_path, page_count, max_pages):
+    """Warn when the PDF has more pages than were rendered. page_count is None when the renderer
+    didn't report it (pdftoppm); pdfinfo is only asked then, i.e. for PDFs that hit the cap."""
+    if page_count is None:
+        try:
+            page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        except Exception as e:
+            logger.debug("Could not read the PDF page count: %s", e)
+            return
+    if page_count > max_pages:
+        logger.warning("PDF has %s pages, processing only the first %s", page_count, max_pages)
+
+
+def _render_pdf_jpegs(pdf_path, max_width, last_page, thread_count, jpeg_quality, grayscale):
+    """Rasterize PDF pages straight to JPEG (PyMuPDF in memory, else pdftoppm files) and return
+    (base64 pages, total page count of the PDF or None when pdftoppm was used)."""
+    if pymupdf is not None:
+        jpeg_pages, page_count = _render_pdf_pymupdf(pdf_path, max_width, last_page, grayscale, jpeg_quality)
+        logger.info("PDF converted to %s page(s)", len(jpeg_pages))
+
+        base64_images = []
+        for i, jpeg_bytes in enumerate(jpeg_pages):
+            base64_images.append(base64.b64encode(jpeg_bytes).decode('ascii'))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Page %s encoded: %.1f KB (%s chars base64)", i+1, len(jpeg_bytes) / 1024, len(base64_images[-1]))
+        return base64_images, page_count
+
+    with tempfile.TemporaryDirectory(prefix="ldx_pages_") as tmpdir:
+        paths = convert_from_path(
+            pdf_path, size=(max_width, None), last_page=last_page, thread_count=thread_count,
+            fmt='jpeg', jpegopt={"quality": jpeg_quality, "optimize": True, "progressive": False},
+            grayscale=grayscale, output_folder=tmpdir, paths_only=True
+        )
+        logger.info("PDF converted to %s page(s)", len(paths))
+
+        base64_images = []
+        # One read buffer for the whole document, grown only when a page is bigger than any before
+        read_buffer = bytearray()
+        for i, path in enumerate(paths):
+            size = os.path.getsize(path)
+            if len(read_buffer) < size:
+                read_buffer = bytearray(size)
+            with open(path, 'rb', buffering=0) as img_file, memoryview(read_buffer) as view:
+                n = img_file.readinto(view[:size])
+                base64_images.append(base64.b64encode(view[:n]).decode('ascii'))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Page %s encoded: %.1f KB (%s chars base64)", i+1, n / 1024, len(base64_images[-1]))
+        return base64_images, None
+
+
+# Placeholder strings models return instead of leaving a field null (compared lowercased)
+_NOT_FOUND_VALUES = frozenset({"not found", "none"})
+
+
+def merge_page_results(page_extractions, fields_to_extract, page_total=None):
     """
     Merge extraction results from multiple pages into a single result.
     Uses the highest confidence result for each field.
+    page_total is the document's page count when some pages were skipped or failed.
     """
-    merged_data = {}
-    field_confidences = {}
+    field_keys = tuple(fields_to_extract)
+    wanted = frozenset(field_keys)
+    best = {}  # field -> (confidence, value); the first value wins ties
     all_reasonings = []
     
-    # For each field, collect all values and their confidence
     for page_result in page_extractions:
         extraction_results = page_result.get("extraction_results", {})
         page_data = extraction_results.get("data", {})
@@ -309,40 +625,43 @@ def merge_page_results(page_extractions, fields_to_extract):
         if page_reasoning:
             all_reasonings.append(page_reasoning)
         
-        for field_key in fields_to_extract.keys():
-            field_data = page_data.get(field_key)
+        for field_key, field_data in page_data.items():
+            if field_key not in wanted:
+                continue
             
-            # Handle new format with per-field confidence
+            # Handle new format with per-field confidence, else old format (plain value)
             if isinstance(field_data, dict) and "value" in field_data:
                 value = field_data.get("value")
                 confidence = field_data.get("confidence", 0)
             else:
-                # Old format
                 value = field_data
                 confidence = page_confidence
             
-            # Skip null/empty values unless we haven't found anything yet
-            if value and value != "null" and str(value).lower() not in ["not found", "none"]:
-                # Use this value if it's the first one or has higher confidence
-                if field_key not in merged_data or confidence > field_confidences.get(field_key, 0):
-                    merged_data[field_key] = value
-                    field_confidences[field_key] = confidence
+            # Skip null/empty values
+            if not value or (isinstance(value, str) and (value == "null" or value.lower() in _NOT_FOUND_VALUES)):
+                continue
+            # Use this value if it's the first one or has higher confidence
+            current = best.get(field_key)
+            if current is None or confidence > current[0]:
+                best[field_key] = (confidence, value)
     
-    # Fill in missing fields with null
-    for field_key in fields_to_extract.keys():
-        if field_key not in merged_data:
-            merged_data[field_key] = None
+    # Fields never found stay null; keep the requested field order
+    merged_data = {key: best[key][1] if key in best else None for key in field_keys}
     
     # Calculate average confidence
-    avg_confidence = sum(field_confidences.values()) / len(field_confidences) if field_confidences else 0
+    avg_confidence = sum(confidence for confidence, _ in best.values()) / len(best) if best else 0
     
+    pages_label = f"{len(page_extractions)} pages"
+    if page_total and page_total != len(page_extractions):
+        pages_label = f"{len(page_extractions)} of {page_total} pages"
+
     # Combine reasonings
     combined_reasoning = " | ".join(set(all_reasonings)) if all_reasonings else "Multi-page extraction"
     
     return {
         "extraction_results": {
             "confidence_score": int(avg_confidence),
-            "reasoning": f"Merged from {len(page_extractions)} pages: {combined_reasoning}",
+            "reasoning": f"Merged from {pages_label}: {combined_reasoning}",
             "data": merged_data,
             "additional_request_result": page_extractions[0].get("extraction_results", {}).get("additional_request_result")
         }
@@ -364,6 +683,9 @@ def extract_structured_data_with_ollama(
     extraction_strategy:
       'auto' — pick the best strategy based on model type
       'single_pass' — direct vision-to-JSON
+
+    A result built despite failed pages (dropped, or answered by the downscaled retry) carries a
+    top-level "page_errors" list next to "extraction_results".
     """
     if not fields_to_extract or not isinstance(fields_to_extract, dict):
         return {"error": "fields_to_extract is required and must be a dictionary {field: description}"}
@@ -408,7 +730,7 @@ def single_pass_extraction(
     model_name = get_ollama_model()
 
     # Ollama-based models
-    print("👁️ Using VISION-AI extraction mode")
+    logger.info("👁️ Using VISION-AI extraction mode")
 
     # Flatten pages list regardless of document type
     if document_content["type"] == "image":
@@ -417,7 +739,13 @@ def single_pass_extraction(
         pages = document_content["pages"]
 
     num_pages = len(pages)
-    print(f"Processing {'single image' if num_pages == 1 else f'PDF with {num_pages} page(s)'}")
+    # Present when blank/blurry pages were skipped: the PDF page number of each entry in pages
+    page_numbers = document_content.get("page_numbers") or list(range(1, num_pages + 1))
+    page_total = document_content.get("page_count", num_pages)
+    if num_pages == 1:
+        logger.info("Processing single image")
+    else:
+        logger.info("Processing PDF with %s page(s)", num_pages)
 
     # Decide strategy
     if is_ocr_specialist_model(model_name):
@@ -425,21 +753,21 @@ def single_pass_extraction(
     else:
         chosen_strategy = 'single_pass'
 
-    print(f"Strategy: {chosen_strategy} (requested={extraction_strategy})")
+    logger.info("Strategy: %s (requested=%s)", chosen_strategy, extraction_strategy)
 
     try:
         if chosen_strategy == 'ocr_specialist':
             return _ocr_specialist_extraction(
-                pages, fields_to_extract, additional_request, doc_type_context
+                pages, fields_to_extract, additional_request, doc_type_context,
+                page_numbers=page_numbers, page_total=page_total
             )
         else:
             return _standard_vision_extraction(
-                pages, fields_to_extract, additional_request, doc_type_context, system_prompt
+                pages, fields_to_extract, additional_request, doc_type_context, system_prompt,
+                page_numbers=page_numbers, page_total=page_total
             )
     except Exception as e:
-        print(f"Error in single_pass_extraction: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in single_pass_extraction: %s", e)
         return {
             "error": f"Error calling Ollama: {str(e)}",
             "extraction_results": {
@@ -451,7 +779,79 @@ def single_pass_extraction(
         }
 
 
-def _ocr_specialist_extraction(pages, fields_to_extract, additional_request, doc_type_context):
+def _map_pages(extract_page, pages):
+    """Run extract_page(i, page) for every page, up to PAGE_WORKERS at a time; results in page order."""
+    workers = min(get_page_workers(), len(pages))
+    if workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(extract_page, range(len(pages)), pages))
+    return [extract_page(i, page) for i, page in enumerate(pages)]
+
+
+class _ResultCache:
+    """Thread-safe, size-bounded LRU of extraction results. Values are deep-copied in and out
+    because callers go on to modify the result dicts they get back."""
+    __slots__ = ("_entries", "_lock", "_max_size")
+
+    def __init__(self, max_size):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._max_size = max_size  # callable, so the env setting is read at use time
+
+    def get(self, key):
+        if not self._max_size():
+            return None
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                return None
+            self._entries[key] = value  # move to the most recently used end
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        max_size = self._max_size()
+        if not max_size:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > max_size:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_PAGE_RESULT_CACHE = _ResultCache(get_page_cache_size)
+
+
+def reset_page_cache():
+    """Forget cached page results (e.g. after a model was pulled and its weights changed)."""
+    _PAGE_RESULT_CACHE.clear()
+
+# Used by app.py, keyed by document_digest() plus the model and request options
+DOCUMENT_RESULT_CACHE = _ResultCache(get_document_cache_size)
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def document_digest(source):
+    """Content digest of an upload: raw bytes, or a file path hashed in 1 MiB chunks."""
+    if isinstance(source, (bytes, bytearray)):
+        return _digest(source)
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def _ocr_specialist_extraction(pages, fields_to_extract, additional_request, doc_type_context,
+                               page_numbers=None, page_total=None):
     """Two-phase extraction for OCR-specialist models (deepseek-ocr, glm-ocr):
       Phase 1 – Vision call with the model's native short OCR prompt → raw text.
                  No JSON format, no verbose instructions that the model would echo back.
@@ -469,53 +869,56 @@ def _ocr_specialist_extraction(pages, fields_to_extract, additional_request, doc
     else:  # deepseek-ocr (default)
         OCR_PROMPT = "<|grounding|>Extract all text from this document."
 
-    page_extractions = []
-    page_errors = []
-    total = len(pages)
-    # Accumulate OCR text across pages for the additional_request answer
-    all_ocr_text = []
+    # Labels use the PDF's own page numbers (pages may have been skipped as blank)
+    page_numbers = page_numbers or list(range(1, len(pages) + 1))
+    total = page_total or len(pages)
+    model_label = "GLM-OCR" if is_glm_ocr_model(model_name) else "DeepSeek OCR"
 
-    for i, page_image in enumerate(pages):
-        label = f"page {i+1}/{total}" if total > 1 else "image"
-        model_label = "GLM-OCR" if is_glm_ocr_model(model_name) else "DeepSeek OCR"
-        print(f"{model_label} Phase 1 (vision): {label}...")
+    def extract_page(i, page_image):
+        """Returns (page_extraction, clean_text, None) or (None, None, error message)."""
+        number = page_numbers[i]
+        label = f"page {number}/{total}" if total > 1 else "image"
+        logger.debug("%s Phase 1 (vision): %s...", model_label, label)
         try:
             raw_ocr = call_ollama_vision_raw(OCR_PROMPT, [page_image])
             # deepseek-ocr wraps regions in <|ref|>...<|/ref|> annotation tokens → strip them
             # glm-ocr outputs clean markdown → strip_deepseek_ocr_annotations is a safe no-op
             clean_text = strip_deepseek_ocr_annotations(raw_ocr)
-            print(f"Phase 1 complete: {len(clean_text)} chars of clean text")
+            logger.debug("Phase 1 complete: %s chars of clean text", len(clean_text))
 
             if not clean_text.strip():
                 raise Exception("Phase 1 returned empty text — image may be blank or unreadable")
 
-            all_ocr_text.append(clean_text)
-
             # Phase 2: regex + contextual parsing (no model call, no VRAM)
-            print(f"{model_label} Phase 2 (regex parse): {label}...")
+            logger.debug("%s Phase 2 (regex parse): %s...", model_label, label)
             extracted_data = parse_ocr_text_to_fields(clean_text, fields_to_extract)
 
             found = [k for k, v in extracted_data.items() if v.get("value") is not None]
-            print(f"Phase 2 complete: found {len(found)}/{len(fields_to_extract)} fields: {found}")
+            logger.debug("Phase 2 complete: found %s/%s fields: %s", len(found), len(fields_to_extract), found)
 
-            page_extractions.append({
+            return {
                 "extraction_results": {
                     "confidence_score": 80,
-                    "reasoning": f"{model_label} two-phase extraction — page {i+1}",
+                    "reasoning": f"{model_label} two-phase extraction — page {number}",
                     "data": extracted_data,
                     "additional_request_result": None
                 }
-            })
+            }, clean_text, None
 
         except Exception as e:
-            page_errors.append(f"Page {i+1}: {str(e)}")
-            print(f"Error on {label}: {e}")
-            continue
+            logger.error("Error on %s: %s", label, e)
+            return None, None, f"Page {number}: {str(e)}"
+
+    outcomes = _map_pages(extract_page, pages)
+    page_extractions = [extraction for extraction, _, _ in outcomes if extraction is not None]
+    page_errors = [error for _, _, error in outcomes if error is not None]
+    # OCR text across pages (in page order) for the additional_request answer
+    all_ocr_text = [text for _, text, _ in outcomes if text is not None]
 
     if not page_extractions:
         raise Exception(f"Failed to process any page. {' | '.join(page_errors[:3])}")
 
-    result = page_extractions[0] if len(page_extractions) == 1 else merge_page_results(page_extractions, fields_to_extract)
+    result = page_extractions[0] if len(page_extractions) == 1 else merge_page_results(page_extractions, fields_to_extract, total)
 
     # If there is an additional_request, do a final targeted vision call on p.1 to answer it
     if additional_request and all_ocr_text:
@@ -524,13 +927,16 @@ def _ocr_specialist_extraction(pages, fields_to_extract, additional_request, doc
             f"[From OCR text] {combined_text[:800]}"
         )
 
+    if page_errors:
+        result["page_errors"] = page_errors
     return result
 
 
 # NOTE: _ocr_then_extract was removed — single_pass is more reliable for all current models
 
 
-def _standard_vision_extraction(pages, fields_to_extract, additional_request, doc_type_context, system_prompt=None):
+def _standard_vision_extraction(pages, fields_to_extract, additional_request, doc_type_context, system_prompt=None,
+                                page_numbers=None, page_total=None):
     """Standard single-pass vision extraction for llama3.2-vision, llava, bakllava, etc."""
     fields_to_extract_str = "\n".join(
         [f"- `{key}`: {description}" for key, description in fields_to_extract.items()]
@@ -582,18 +988,27 @@ OUTPUT FORMAT: Return ONLY valid JSON matching this exact structure:
 
 Now analyze the document image and extract the requested fields. DO NOT wrap JSON in markdown blocks like ```json."""
 
-    total = len(pages)
-    page_extractions = []
-    page_errors = []
-
-    for i, page_image in enumerate(pages):
-        label = f"page {i+1}/{total}" if total > 1 else "image"
-        print(f"Processing {label}...")
+    # Labels and the page note use the PDF's own page numbers (pages may have been skipped as blank)
+    page_numbers = page_numbers or list(range(1, len(pages) + 1))
+    total = page_total or len(pages)
+    # Only the page number changes between pages; the rest of the note is formatted once
+    page_note = f"\n\nNote: This is page {{}} of {total} from the document."
+    # Identical pages (repeated letterheads, blank separators, re-uploads) reuse an earlier result
+    model_key = (get_ollama_base_url(), get_ollama_model())
+    instruction_digest = _digest(instruction.encode('utf-8'))
+
+    def extract_page(i, page_image):
+        """Returns (page_result, None) or (None, error message)."""
+        number = page_numbers[i]
+        label = f"page {number}/{total}" if total > 1 else "image"
+        cache_key = (model_key, instruction_digest, _digest(page_image.encode('ascii')))
+        cached = _PAGE_RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Reusing cached result for identical %s", label)
+            return cached, None
+        logger.debug("Processing %s...", label)
         try:
-            page_instruction = (
-                f"{instruction}\n\nNote: This is page {i+1} of {total} from the document."
-                if total > 1 else instruction
-            )
+            page_instruction = instruction + page_note.format(number) if total > 1 else instruction
             page_response = call_ollama_vision(page_instruction, [page_image])
             
             # Clean possible markdown wrap
@@ -606,32 +1021,43 @@ Now analyze the document image and extract the requested fields. DO NOT wrap JSO
                 page_response = page_response[:-3]
 
             page_result = parse_extraction_result(page_response, fields_to_extract)
-            page_extractions.append(page_result)
+            _PAGE_RESULT_CACHE.put(cache_key, page_result)
+            return page_result, None
         except Exception as page_error:
-            print(f"Error processing {label}: {page_error}")
+            logger.error("Error processing %s: %s", label, page_error)
             try:
-                import time as _time
-                print(f"Unloading model and waiting before retry...")
-                unload_ollama_model()
-                print(f"Retrying {label} with aggressively smaller image (768px)...")
+                # Other pages/extractions may be generating concurrently: don't evict the model under them
+                if _can_unload_for_retry():
+                    logger.info("Unloading model and waiting before retry...")
+                    unload_ollama_model()
+                logger.info("Retrying %s with aggressively smaller image (768px)...", label)
                 smaller = downscale_base64_image(page_image, max_width=768, jpeg_quality=75)
                 retry_response = call_ollama_vision(page_instruction, [smaller])
+                # Not cached: the downscaled answer must not stand in for the full-resolution page
                 retry_result = parse_extraction_result(retry_response, fields_to_extract)
-                page_extractions.append(retry_result)
-                print(f"Retry succeeded for {label}")
+                logger.info("Retry succeeded for %s", label)
+                # Reported (not fatal) so callers know this page was read from a degraded image
+                return retry_result, f"Page {number}: answered by the 768px retry after: {page_error}"
             except Exception as retry_error:
-                page_errors.append(f"Page {i+1}: {str(retry_error)}")
-                print(f"Retry failed for {label}: {retry_error}")
-                continue
+                logger.error("Retry failed for %s: %s", label, retry_error)
+                return None, f"Page {number}: {str(retry_error)}"
+
+    outcomes = _map_pages(extract_page, pages)
+    page_extractions = [result for result, _ in outcomes if result is not None]
+    page_errors = [error for _, error in outcomes if error is not None]
 
     if not page_extractions:
         detailed = " | ".join(page_errors[:3]) if page_errors else "No valid extraction produced"
         raise Exception(f"Failed to process any page of the document. {detailed}")
 
     if len(page_extractions) == 1:
-        return page_extractions[0]
-    print(f"Merging results from {len(page_extractions)} pages...")
-    return merge_page_results(page_extractions, fields_to_extract)
+        result = page_extractions[0]
+    else:
+        logger.info("Merging results from %s pages...", len(page_extractions))
+        result = merge_page_results(page_extractions, fields_to_extract, total)
+    if page_errors:
+        result["page_errors"] = page_errors
+    return result
 
 
 def parse_ocr_text_to_fields(ocr_text, fields_to_extract):
@@ -801,6 +1227,85 @@ def strip_deepseek_ocr_annotations(text):
     return text.strip()
 
 
+class _JsonObjectScanner:
+    """Incremental, string/escape-aware brace counter that spots where the first top-level
+    JSON object ends, so a streamed answer can be cut off as soon as it is complete."""
+    __slots__ = ("depth", "in_string", "escaped")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        """Scan the next piece of text; return the index just past the closing brace, or -1."""
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                if self.depth:
+                    self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}' and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return i + 1
+        return -1
+
+
+def _extract_json_object(text):
+    """Return the first complete top-level {...} object in text, or None.
+    Linear scan (no regex backtracking) that ignores braces inside JSON strings."""
+    start = text.find('{')
+    if start == -1:
+        return None
+    end = _JsonObjectScanner().feed(text[start:])
+    if end == -1:
+        return None
+    return text[start:start + end]
+
+
+def _stream_generate(url, payload, stop_at_json=False):
+    """Call /api/generate with stream=True and return the concatenated 'response' text.
+    With stop_at_json, reading stops once the first JSON object is complete; closing the
+    connection makes Ollama cancel the rest of the generation (e.g. trailing whitespace
+    that format=json models can emit until num_predict).
+    """
+    chunks = []
+    scanner = _JsonObjectScanner() if stop_at_json else None
+    with _post_json(url, {**payload, "stream": True}, stream=True, timeout=get_ollama_timeout()) as response:
+        if not response.ok:
+            response.content  # read the error body now so callers can still use e.response.text
+        response.raise_for_status()
+        for raw_line in response.iter_lines():
+            if not raw_line:
+                continue
+            try:
+                chunk = orjson.loads(raw_line)
+            except orjson.JSONDecodeError:
+                continue
+            if chunk.get("error"):
+                raise Exception(f"Ollama error: {chunk['error']}")
+            piece = chunk.get("response", "")
+            if piece and scanner is not None:
+                end = scanner.feed(piece)
+                if end != -1:
+                    chunks.append(piece[:end])
+                    logger.debug("[Vision] JSON object complete, stopping generation early")
+                    break
+            if piece:
+                chunks.append(piece)
+            if chunk.get("done", False):
+                break
+    return "".join(chunks)
+
+
 def _call_ollama_chat(model, prompt, images_base64, base_url, options, format_json=False):
     """Call Ollama /api/chat endpoint using streaming to work around the Qwen3.5
     non-streaming empty-content bug.
@@ -837,19 +1342,22 @@ def _call_ollama_chat(model, prompt, images_base64, base_url, options, format_js
     if format_json and not any(kw in model.lower() for kw in ['qwen', 'qwq']):
         payload["format"] = "json"
 
+    # Encoded once: the retry below resends the same multi-MB body
+    body = orjson.dumps(payload)
+
     def _do_streaming_call():
         """Perform one streaming call, return (content_text, thinking_text)."""
         content_chunks = []
         thinking_chunks = []
-        print(f"[Chat API streaming] Calling {model} via /api/chat (stream=True)...")
-        with requests.post(url, json=payload, stream=True, timeout=get_ollama_timeout()) as response:
+        logger.debug("[Chat API streaming] Calling %s via /api/chat (stream=True)...", model)
+        with _post_json(url, body, stream=True, timeout=get_ollama_timeout()) as response:
             response.raise_for_status()
-            for raw_line in response.iter_lines(decode_unicode=True):
+            for raw_line in response.iter_lines():
                 if not raw_line:
                     continue
                 try:
-                    chunk = json.loads(raw_line)
-                except json.JSONDecodeError:
+                    chunk = orjson.loads(raw_line)
+                except orjson.JSONDecodeError:
                     continue
                 msg = chunk.get("message", {})
                 # Collect 'content' (the actual answer)
@@ -869,33 +1377,37 @@ def _call_ollama_chat(model, prompt, images_base64, base_url, options, format_js
 
     # First attempt
     response_text, thinking_text = _do_streaming_call()
-    print(f"[Chat API streaming] Collected {len(response_text)} chars of content, {len(thinking_text)} chars of thinking")
+    logger.debug("[Chat API streaming] Collected %s chars of content, %s chars of thinking", len(response_text), len(thinking_text))
 
     # If content is empty, try to salvage from thinking tokens
     if not response_text and thinking_text:
-        print(f"[Chat API streaming] Content is empty but got {len(thinking_text)} thinking chars — checking for JSON in thinking...")
+        logger.info("[Chat API streaming] Content is empty but got %s thinking chars — checking for JSON in thinking...", len(thinking_text))
         # Strip thinking tags and try to use the text
         cleaned_thinking = strip_thinking_tags(thinking_text)
         if cleaned_thinking:
             # Check if thinking contains JSON (model might have put the answer there)
             if '{' in cleaned_thinking and '}' in cleaned_thinking:
-                print(f"[Chat API streaming] Found potential JSON in thinking block, using as response")
+                logger.info("[Chat API streaming] Found potential JSON in thinking block, using as response")
                 response_text = cleaned_thinking
             else:
-                print(f"[Chat API streaming] Thinking block has text but no JSON")
+                logger.warning("[Chat API streaming] Thinking block has text but no JSON")
 
     # If still empty, unload model and retry once
     if not response_text:
-        print(f"[Chat API streaming] Empty response — unloading model and retrying...")
-        unload_ollama_model()
+        if _can_unload_for_retry():
+            logger.info("[Chat API streaming] Empty response — unloading model and retrying...")
+            unload_ollama_model()
+        else:
+            # Other pages/extractions are generating concurrently: unloading would evict the model under them
+            logger.info("[Chat API streaming] Empty response — retrying...")
         response_text, thinking_text = _do_streaming_call()
-        print(f"[Chat API streaming RETRY] Collected {len(response_text)} chars of content, {len(thinking_text)} chars of thinking")
+        logger.info("[Chat API streaming RETRY] Collected %s chars of content, %s chars of thinking", len(response_text), len(thinking_text))
 
         # Try thinking fallback again on retry
         if not response_text and thinking_text:
             cleaned_thinking = strip_thinking_tags(thinking_text)
             if cleaned_thinking and '{' in cleaned_thinking and '}' in cleaned_thinking:
-                print(f"[Chat API streaming RETRY] Using JSON from thinking block")
+                logger.info("[Chat API streaming RETRY] Using JSON from thinking block")
                 response_text = cleaned_thinking
 
     return response_text
@@ -932,21 +1444,21 @@ def call_ollama_vision_raw(prompt, images_base64):
 
     try:
         if any(kw in model.lower() for kw in ['qwen', 'qwq']):
-            print(f"[OCR Phase 1] By-passing /api/generate for {model}, using /api/chat directly...")
+            logger.info("[OCR Phase 1] By-passing /api/generate for %s, using /api/chat directly...", model)
             response_text = _call_ollama_chat(model, prompt, images_base64, base_url, options)
         else:
-            print(f"[OCR Phase 1] Calling {model} for raw text extraction...")
-            response = requests.post(url, json=payload, timeout=get_ollama_timeout())
+            logger.debug("[OCR Phase 1] Calling %s for raw text extraction...", model)
+            response = _post_json(url, payload, timeout=get_ollama_timeout())
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             response_text = result.get("response", "")
 
         if not response_text:
-            print("WARNING: Empty OCR response from Ollama")
+            logger.warning("Empty OCR response from Ollama")
             return ""
         # Strip thinking tags if present
         response_text = strip_thinking_tags(response_text)
-        print(f"[OCR Phase 1] Got {len(response_text)} chars of OCR text")
+        logger.debug("[OCR Phase 1] Got %s chars of OCR text", len(response_text))
         return response_text
     except requests.exceptions.RequestException as e:
         if hasattr(e, 'response') and e.response is not None:
@@ -977,7 +1489,7 @@ def call_ollama_vision(prompt, images_base64):
     num_ctx = 16384 if thinking else 8192
     if thinking:
         prompt = prompt + " /no_think"
-        print(f"[Thinking model] Added /no_think, num_ctx={num_ctx}")
+        logger.debug("[Thinking model] Added /no_think, num_ctx=%s", num_ctx)
 
     # Qwen VL models tile images into 14x14px patches. Large images (>1024px wide)
     # can produce thousands of tokens and overflow the context window silently.
@@ -989,7 +1501,7 @@ def call_ollama_vision(prompt, images_base64):
             downscale_base64_image(img, max_width=max_w, jpeg_quality=85)
             for img in images_base64
         ]
-        print(f"[Qwen vision] Pre-downscaled images to max {max_w}px to avoid context overflow")
+        logger.debug("[Qwen vision] Pre-downscaled images to max %spx to avoid context overflow", max_w)
     
     options = {
         "temperature": 0.1,
@@ -1007,7 +1519,7 @@ def call_ollama_vision(prompt, images_base64):
     # produces 0 chars of actual 'content', causing the empty response bug.
     if thinking:
         options["think"] = False
-        print(f"[Thinking model] Disabled CoT (think=False), num_ctx={num_ctx}")
+        logger.debug("[Thinking model] Disabled CoT (think=False), num_ctx=%s", num_ctx)
     
     payload = {
         "model": model,
@@ -1025,43 +1537,41 @@ def call_ollama_vision(prompt, images_base64):
         payload["format"] = "json"
     
     try:
-        print(f"Calling Ollama with model: {model}")
-        print(f"Processing {len(images_base64)} image(s)...")
+        logger.debug("Calling Ollama with model: %s", model)
+        logger.debug("Processing %s image(s)...", len(images_base64))
 
         if is_qwen:
-            print(f"[{model}] Routing directly to /api/chat to bypass empty /generate bug...")
+            logger.info("[%s] Routing directly to /api/chat to bypass empty /generate bug...", model)
             response_text = _call_ollama_chat(model, prompt, images_base64, base_url, options, format_json=True)
         else:
-            response = requests.post(url, json=payload, timeout=get_ollama_timeout())
-            response.raise_for_status()
-            result = response.json()
-            response_text = result.get("response", "")
+            # Streamed so the answer can be cut off as soon as the JSON object closes
+            response_text = _stream_generate(url, payload, stop_at_json="format" in payload)
 
             # Fallback to /api/chat if generate returned empty (qwen3-vl, etc.)
             if not response_text:
-                print("[Vision] Empty from /api/generate, trying /api/chat fallback...")
+                logger.info("[Vision] Empty from /api/generate, trying /api/chat fallback...")
                 response_text = _call_ollama_chat(model, prompt, images_base64, base_url, options, format_json=True)
 
         if not response_text:
-            print("WARNING: Empty response from Ollama")
+            logger.warning("Empty response from Ollama")
             raise Exception("Empty response from Ollama")
 
         # Strip <think>...</think> from thinking models before JSON parsing
         if thinking:
             response_text = strip_thinking_tags(response_text)
         
-        print(f"Ollama response length: {len(response_text)} characters")
+        logger.debug("Ollama response length: %s characters", len(response_text))
         return response_text
     
     except requests.exceptions.Timeout:
-        print("ERROR: Ollama request timed out")
+        logger.error("Ollama request timed out")
         raise Exception("Ollama request timed out. Try with a smaller document or faster model.")
     except requests.exceptions.RequestException as e:
-        print(f"Error calling Ollama API: {e}")
+        logger.error("Error calling Ollama API: %s", e)
         if hasattr(e, 'response') and e.response is not None:
             status_code = e.response.status_code
-            print(f"Response status: {status_code}")
-            print(f"Response body: {e.response.text[:500]}")
+            logger.error("Response status: %s", status_code)
+            logger.error("Response body: %s", e.response.text[:500])
             
             # Provide helpful error messages
             if status_code == 400:
@@ -1075,9 +1585,18 @@ def call_ollama_vision(prompt, images_base64):
                 raise Exception("Ollama internal error. The model might have crashed. Try restarting Ollama: ollama serve")
         raise
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise
 
+# (model_name, base_url) -> bool, only for answers backed by a successful /api/show
+_VISION_CHECK_CACHE = {}
+
+
+def reset_vision_cache():
+    """Forget cached is_vision_model answers (e.g. after a model was pulled or replaced)."""
+    _VISION_CHECK_CACHE.clear()
+
+
 def is_vision_model(model_name, base_url):
     """
     Check if a model supports vision/image input.
@@ -1085,87 +1604,94 @@ def is_vision_model(model_name, base_url):
     Primary method: check 'capabilities' list from /api/show (Ollama ≥ 0.8).
     Fallback: check for CLIP in families, projector_info, vision model_info keys,
     or known vision family names.
+    Answers are cached per (model, base_url), so multi-page documents probe /api/show once.
     """
+    key = (model_name, base_url)
+    cached = _VISION_CHECK_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        show_response = requests.post(
+        show_response = OLLAMA_SESSION.post(
             f"{base_url}/api/show",
             json={"name": model_name},
             timeout=5
         )
         
         if show_response.status_code == 200:
-            show_data = show_response.json()
-            
-            # ── Primary: 'capabilities' field (most reliable) ──
-            capabilities = show_data.get('capabilities', [])
-            if 'vision' in capabilities:
-                print(f"Model {model_name} is vision-capable (capabilities={capabilities})")
-                return True
-            if capabilities and 'vision' not in capabilities:
-                print(f"Model {model_name} is text-only (capabilities={capabilities})")
-                return False
-            
-            # ── Fallback 1: CLIP in families or projector_info ──
-            details = show_data.get('details', {})
-            families = details.get('families', [])
-            if 'clip' in families:
-                print(f"Model {model_name} is vision-capable (has CLIP)")
-                return True
-            if 'projector_info' in show_data:
-                print(f"Model {model_name} is vision-capable (has projector)")
-                return True
-            
-            # ── Fallback 2: vision keys in model_info ──
-            model_info = show_data.get('model_info', {})
-            if any('.vision.' in k for k in model_info.keys()):
-                print(f"Model {model_name} is vision-capable (has vision keys in model_info)")
-                return True
-            
-            # ── Fallback 3: known vision families ──
-            family = details.get('family', '').lower()
-            known_vision_families = {
-                'mllama', 'llava', 'bakllava', 'qwen3vl', 'qwen2vl',
-                'deepseekocr', 'deepseek-ocr', 'deepseek-vl', 'glm-ocr',
-                'gemma3', 'llama4',
-            }
-            if family in known_vision_families or any(f.lower() in known_vision_families for f in families):
-                print(f"Model {model_name} is vision-capable (known vision family: {family})")
-                return True
-            
-            # ── Fallback 4: keywords in model name ──
-            model_lower = model_name.lower()
-            if any(kw in model_lower for kw in ['vision', 'llava', 'bakllava', '-vl', 'deepseek-ocr', 'glm-ocr']):
-                print(f"Model {model_name} is vision-capable (name contains vision keyword)")
-                return True
-            
-            print(f"Model {model_name} appears to be text-only (family: {family}, families: {families})")
-            return False
+            result = _vision_from_show(model_name, orjson.loads(show_response.content))
+            _VISION_CHECK_CACHE[key] = result
+            return result
         
-        # If /api/show failed, assume vision to avoid blocking
-        print(f"Warning: Could not verify if {model_name} is a vision model")
+        # If /api/show failed, assume vision to avoid blocking (not cached, retried next call)
+        logger.warning("Could not verify if %s is a vision model", model_name)
         return True
         
     except Exception as e:
-        print(f"Error checking if model is vision-capable: {e}")
+        logger.error("Error checking if model is vision-capable: %s", e)
         return True  # Assume yes on error to avoid blocking
 
+
+def _vision_from_show(model_name, show_data):
+    """Decide vision support from an /api/show response body."""
+    # ── Primary: 'capabilities' field (most reliable) ──
+    capabilities = show_data.get('capabilities', [])
+    if 'vision' in capabilities:
+        logger.debug("Model %s is vision-capable (capabilities=%s)", model_name, capabilities)
+        return True
+    if capabilities and 'vision' not in capabilities:
+        logger.debug("Model %s is text-only (capabilities=%s)", model_name, capabilities)
+        return False
+    
+    # ── Fallback 1: CLIP in families or projector_info ──
+    details = show_data.get('details', {})
+    families = details.get('families', [])
+    if 'clip' in families:
+        logger.debug("Model %s is vision-capable (has CLIP)", model_name)
+        return True
+    if 'projector_info' in show_data:
+        logger.debug("Model %s is vision-capable (has projector)", model_name)
+        return True
+    
+    # ── Fallback 2: vision keys in model_info ──
+    model_info = show_data.get('model_info', {})
+    if any('.vision.' in k for k in model_info.keys()):
+        logger.debug("Model %s is vision-capable (has vision keys in model_info)", model_name)
+        return True
+    
+    # ── Fallback 3: known vision families ──
+    family = details.get('family', '').lower()
+    if family in KNOWN_VISION_FAMILIES or not KNOWN_VISION_FAMILIES.isdisjoint(f.lower() for f in families):
+        logger.debug("Model %s is vision-capable (known vision family: %s)", model_name, family)
+        return True
+    
+    # ── Fallback 4: keywords in model name ──
+    if VISION_NAME_RE.search(model_name):
+        logger.debug("Model %s is vision-capable (name contains vision keyword)", model_name)
+        return True
+    
+    logger.debug("Model %s appears to be text-only (family: %s, families: %s)", model_name, family, families)
+    return False
+
 def parse_extraction_result(response_text, fields_to_extract, ocr_text=None):
     """
     Parse the extraction result from Ollama, handling various response formats.
     """
     import re
     
+    # stdlib json on purpose: orjson turns integers beyond 64 bits (long IDs/codes the model
+    # writes unquoted) into lossy floats. Ollama's own response envelopes use orjson.
     try:
         result = json.loads(response_text)
     except json.JSONDecodeError as je:
-        print(f"JSON decode error: {je}")
-        print(f"Raw response (first 500 chars): {response_text[:500]}")
+        logger.warning("JSON decode error: %s", je)
+        logger.warning("Raw response (first 500 chars): %s", response_text[:500])
         
         # Try to extract JSON from response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
+        json_text = _extract_json_object(response_text)
+        if json_text:
             try:
-                result = json.loads(json_match.group())
+                result = json.loads(json_text)
             except:
                 raise Exception(f"Could not parse JSON response")
         else:
@@ -1215,7 +1741,7 @@ def parse_extraction_result(response_text, fields_to_extract, ocr_text=None):
             field_confidences.append(confidence)
             
             if confidence < 50:
-                print(f"⚠️ Low confidence ({confidence}%) for field '{field_key}': {processed_data[field_key]}")
+                logger.warning("⚠️ Low confidence (%s%%) for field '%s': %s", confidence, field_key, processed_data[field_key])
         else:
             processed_data[field_key] = field_data
             field_confidences.append(50)
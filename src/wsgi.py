@@ -0,0 +1,5 @@
+"""WSGI entry point for running the extractor under a production server.
+
+    gunicorn -k gthread -w 1 --threads 8 -b 0.0.0.0:5000 --chdir src wsgi:app
+"""
+from app import app